@@ -1,13 +1,18 @@
 import sys
-from typing import Any
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Iterator, Optional
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import (
     ClientError,
     EndpointConnectionError,
     NoCredentialsError,
     NoRegionError,
-    ParamValidationError,
     PartialCredentialsError,
 )
 from PIL import Image
@@ -19,12 +24,137 @@ from textractor.parsers import response_parser
 from exceptions import (
     AmazonTextractCredentialsException,
     AmazonTextractEndpointUnreachableException,
+    AmazonTextractException,
     AmazonTextractGenericException,
     AmazonTextractRegionException,
 )
+from textract_cache import TextractResponseCache
 
+# Prefix of S3 keys used for PDF documents analyzed by asynchronous Textract job
+S3_KEY_PREFIX: str = "pdfix-autotag-textract"
 
-def process_image(aws_access_key_id: str, aws_secret_access_key: str, aws_region: str, image_path: str) -> Document:
+# How often (in seconds) is asynchronous Textract job checked if it is done
+TEXTRACT_JOB_POLLING_INTERVAL: float = 2.0
+
+# Adaptive retry mode rate limits requests on client side (token bucket) and retries throttled requests
+# (ThrottlingException, ProvisionedThroughputExceededException, ...) with exponential backoff.
+# Connection pool is large enough for all pages processed at the same time (see --workers),
+# TCP keep-alive keeps idle pooled connections open between pages so they are reused without new handshake.
+# Read timeout leaves enough time for analysis of dense pages, hanging connection is retried instead.
+TEXTRACT_CLIENT_CONFIG: Config = Config(
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    max_pool_connections=32,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=60,
+)
+
+# Exceptions raised by boto3 and their application counterparts with proper error codes,
+# all other exceptions are reported as generic Amazon Textract failure
+TEXTRACT_EXCEPTIONS: dict[type[Exception], type[AmazonTextractException]] = {
+    NoCredentialsError: AmazonTextractCredentialsException,
+    PartialCredentialsError: AmazonTextractCredentialsException,
+    NoRegionError: AmazonTextractRegionException,
+    EndpointConnectionError: AmazonTextractEndpointUnreachableException,
+}
+
+# Error codes of boto3 ClientError caused by invalid credentials
+TEXTRACT_CREDENTIALS_ERROR_CODES: set[str] = {
+    "UnrecognizedClientException",
+    "InvalidClientTokenId",
+    "SignatureDoesNotMatch",
+}
+
+# Textract response of page without any layout, used for blank pages that are not analyzed
+BLANK_PAGE_RESPONSE: dict = {
+    "DocumentMetadata": {"Pages": 1},
+    "Blocks": [
+        {
+            "BlockType": "PAGE",
+            "Id": "blank-page",
+            "Page": 1,
+            "Geometry": {
+                "BoundingBox": {"Width": 1.0, "Height": 1.0, "Left": 0.0, "Top": 0.0},
+                "Polygon": [{"X": 0.0, "Y": 0.0}, {"X": 1.0, "Y": 0.0}, {"X": 1.0, "Y": 1.0}, {"X": 0.0, "Y": 1.0}],
+            },
+        }
+    ],
+}
+
+# Creating boto3 client from default session is not thread safe
+textract_client_lock: threading.Lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def get_textract_client(aws_access_key_id: str, aws_secret_access_key: str, aws_region: str) -> Any:
+    """
+    Creates boto3 Textract client. Client is cached so all pages share its connection pool and rate limiter.
+
+    Args:
+        aws_access_key_id (str): AWS Access Key ID.
+        aws_secret_access_key (str): AWS Secret Access Key.
+        aws_region (str): AWS Region.
+
+    Returns:
+        The boto3 Textract client.
+    """
+    return boto3.client(
+        "textract",
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        region_name=aws_region,
+        config=TEXTRACT_CLIENT_CONFIG,
+    )
+
+
+@lru_cache(maxsize=8)
+def get_s3_client(aws_access_key_id: str, aws_secret_access_key: str, aws_region: str) -> Any:
+    """
+    Creates boto3 S3 client used for uploading documents for asynchronous Textract job.
+
+    Args:
+        aws_access_key_id (str): AWS Access Key ID.
+        aws_secret_access_key (str): AWS Secret Access Key.
+        aws_region (str): AWS Region.
+
+    Returns:
+        The boto3 S3 client.
+    """
+    return boto3.client(
+        "s3",
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        region_name=aws_region,
+    )
+
+
+@contextmanager
+def textract_exceptions() -> Iterator[None]:
+    """
+    Converts boto3 and Textract exceptions into application exceptions with proper error codes.
+    """
+    try:
+        yield
+    except Exception as e:
+        print(e, file=sys.stderr)
+
+        if isinstance(e, ClientError) and e.response["Error"]["Code"] in TEXTRACT_CREDENTIALS_ERROR_CODES:
+            raise AmazonTextractCredentialsException()
+
+        for exception_type, application_exception_type in TEXTRACT_EXCEPTIONS.items():
+            if isinstance(e, exception_type):
+                raise application_exception_type()
+
+        raise AmazonTextractGenericException()
+
+
+def process_image(
+    aws_access_key_id: str,
+    aws_secret_access_key: str,
+    aws_region: str,
+    image: bytes,
+    cache: Optional[TextractResponseCache] = None,
+) -> Document:
     """
     Analyzes the document using Textract and returns the document object.
 
@@ -32,61 +162,104 @@ def process_image(aws_access_key_id: str, aws_secret_access_key: str, aws_region
         aws_access_key_id (str): AWS Access Key ID.
         aws_secret_access_key (str): AWS Secret Access Key.
         aws_region (str): AWS Region.
-        image_path (str): Path to the image file to be analyzed.
+        image (bytes): Encoded image to be analyzed.
+        cache (Optional[TextractResponseCache]): Cache of Amazon Textract responses.
 
     Returns:
         The document object containing the analysis results.
     """
-    try:
-        # Create boto3 Textract client
-        textract_client: Any = boto3.client(
-            "textract",
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region,
-        )
-
-        # Inspired with arguments with what is in extractor.analyze_document only different boto3 client is used
-        textract_json: dict = call_textract(
-            input_document=image_path,
-            features=[Textract_Features.TABLES, Textract_Features.LAYOUT],
-            call_mode=Textract_Call_Mode.FORCE_SYNC,
-            boto3_textract_client=textract_client,
-            job_done_polling_interval=0,
-        )
+    with textract_exceptions():
+        # Reuse response of identical image that was already analyzed
+        textract_json: Optional[dict] = cache.load(image) if cache else None
+
+        if textract_json is None:
+            # Get shared boto3 Textract client
+            with textract_client_lock:
+                textract_client: Any = get_textract_client(aws_access_key_id, aws_secret_access_key, aws_region)
+
+            # Inspired with arguments with what is in extractor.analyze_document only different boto3 client is used
+            textract_json = call_textract(
+                input_document=image,
+                features=[Textract_Features.TABLES, Textract_Features.LAYOUT],
+                call_mode=Textract_Call_Mode.FORCE_SYNC,
+                boto3_textract_client=textract_client,
+                job_done_polling_interval=0,
+            )
+
+            if cache:
+                cache.save(image, textract_json)
 
         # Created JSON needs to be further processed by textractor-parser to more useful format
         document: Document = response_parser.parse(textract_json)
         document.response = textract_json
 
         # Save image so visualization can be done later
-        document.pages[0].image = Image.open(image_path)
+        document.pages[0].image = Image.open(BytesIO(image))
 
-    except NoCredentialsError as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractCredentialsException()
-    except PartialCredentialsError as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractCredentialsException()
-    except NoRegionError as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractRegionException()
-    except EndpointConnectionError as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractEndpointUnreachableException()
-    except ParamValidationError as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractGenericException()
-    except ClientError as e:
-        error_code = e.response["Error"]["Code"]
-        if error_code in ["UnrecognizedClientException", "InvalidClientTokenId", "SignatureDoesNotMatch"]:
-            print(e, file=sys.stderr)
-            raise AmazonTextractCredentialsException()
-        else:
-            print(e, file=sys.stderr)
-            raise AmazonTextractGenericException()
-    except Exception as e:
-        print(e, file=sys.stderr)
-        raise AmazonTextractGenericException()
+    return document
 
+
+def create_blank_page_document() -> Document:
+    """
+    Creates the document object for blank page without sending it to Textract.
+
+    Returns:
+        The document object with one page without any layout.
+    """
+    document: Document = response_parser.parse(BLANK_PAGE_RESPONSE)
+    document.response = BLANK_PAGE_RESPONSE
     return document
+
+
+def process_pdf_document(
+    aws_access_key_id: str, aws_secret_access_key: str, aws_region: str, pdf_path: str, s3_bucket: str
+) -> list[Document]:
+    """
+    Analyzes whole PDF document using one asynchronous Textract job. Asynchronous Textract API reads documents
+    only from S3, so the document is uploaded into the bucket and removed when the job is done.
+
+    Args:
+        aws_access_key_id (str): AWS Access Key ID.
+        aws_secret_access_key (str): AWS Secret Access Key.
+        aws_region (str): AWS Region.
+        pdf_path (str): Path to PDF document to be analyzed.
+        s3_bucket (str): S3 bucket used for uploading the document.
+
+    Returns:
+        The document objects containing the analysis results, one for each page.
+    """
+    with textract_exceptions():
+        # Get shared boto3 clients
+        with textract_client_lock:
+            textract_client: Any = get_textract_client(aws_access_key_id, aws_secret_access_key, aws_region)
+            s3_client: Any = get_s3_client(aws_access_key_id, aws_secret_access_key, aws_region)
+
+        s3_key: str = f"{S3_KEY_PREFIX}/{uuid.uuid4()}.pdf"
+        s3_client.upload_file(pdf_path, s3_bucket, s3_key)
+
+        try:
+            # Starts document analysis job and polls it till all result pages are collected
+            textract_json: dict = call_textract(
+                input_document=f"s3://{s3_bucket}/{s3_key}",
+                features=[Textract_Features.TABLES, Textract_Features.LAYOUT],
+                call_mode=Textract_Call_Mode.FORCE_ASYNC,
+                boto3_textract_client=textract_client,
+                job_done_polling_interval=TEXTRACT_JOB_POLLING_INTERVAL,
+            )
+        finally:
+            s3_client.delete_object(Bucket=s3_bucket, Key=s3_key)
+
+        # Rest of the processing works with one page documents, so split blocks according to page
+        number_of_pages: int = textract_json["DocumentMetadata"]["Pages"]
+        page_blocks: list[list[dict]] = [[] for _ in range(number_of_pages)]
+        for block in textract_json["Blocks"]:
+            page_blocks[block["Page"] - 1].append(block)
+
+        documents: list[Document] = []
+        for blocks in page_blocks:
+            page_json: dict = {"DocumentMetadata": {"Pages": 1}, "Blocks": blocks}
+            document: Document = response_parser.parse(page_json)
+            document.response = page_json
+            documents.append(document)
+
+    return documents
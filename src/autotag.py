@@ -1,55 +1,49 @@
-import json
-import tempfile
+import sys
 from pathlib import Path
-from typing import Any, BinaryIO, Optional, cast
+from typing import Optional
 
-# import cv2
+import orjson
 from pdfixsdk import (
     GetPdfix,
     PdfDoc,
     PdfDocTemplate,
     Pdfix,
-    PdfPage,
     PdfPageView,
     PdfTagsParams,
     PsMemoryStream,
     kDataFormatJson,
-    kRotate0,
     kSaveFull,
 )
-from PIL import Image
 from textractor.entities.document import Document
 from tqdm import tqdm
 
-from ai import process_image
 from constants import (
-    PERCENT_AI,
-    PERCENT_RENDER,
-    PERCENT_TEMPLATE,
+    OUTPUT_FOLDER,
     PROGRESS_FIRST_STEP,
     PROGRESS_FOURTH_STEP,
+    PROGRESS_NON_TTY_INTERVAL,
     PROGRESS_SECOND_STEP,
     PROGRESS_THIRD_STEP,
 )
-from convertor import ConvertDocumentToDictionary
 from exceptions import (
     PdfixFailedToOpenException,
     PdfixFailedToSaveException,
     PdfixFailedToTagException,
     PdfixInitializeException,
 )
-from page_renderer import render_page
+from pages_processor import AmazonTextractPagesProcessor
 from template_json import TemplateJsonCreator
-from utils_sdk import authorize_sdk, json_to_raw_data
+from textract_cache import TextractResponseCache
+from utils_sdk import authorize_sdk, bytes_to_raw_data
 
-# from visualisation import VisualizeAmazonResults
 
-
-class AutotagUsingAmazonTextractRecognition:
+class AutotagUsingAmazonTextractRecognition(AmazonTextractPagesProcessor):
     """
     Class that takes care of Autotagging provided PDF document using AWS Textract Engine.
     """
 
+    pdfix_exception = PdfixFailedToTagException
+
     def __init__(
         self,
         aws_access_key_id: str,
@@ -60,6 +54,11 @@ class AutotagUsingAmazonTextractRecognition:
         input_path: str,
         output_path: str,
         zoom: float,
+        workers: int,
+        cache_dir: Optional[str],
+        s3_bucket: Optional[str],
+        visualize: bool,
+        skip_blank: bool,
     ) -> None:
         """
         Initialize class for tagging pdf.
@@ -73,6 +72,11 @@ class AutotagUsingAmazonTextractRecognition:
             input_path (str): Path to PDF document.
             output_path (str): Path where tagged PDF should be saved.
             zoom (float): Zoom level for rendering the page.
+            workers (int): Number of pages sent to Amazon Textract at the same time.
+            cache_dir (Optional[str]): Directory for caching Amazon Textract responses.
+            s3_bucket (Optional[str]): S3 bucket for analyzing whole document by one asynchronous Textract job.
+            visualize (bool): Whether to save visualizations and conversions of Amazon Textract results.
+            skip_blank (bool): Whether to skip Amazon Textract analysis of pages without any content.
         """
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
@@ -82,6 +86,13 @@ class AutotagUsingAmazonTextractRecognition:
         self.input_path_str = input_path
         self.output_path_str = output_path
         self.zoom = zoom
+        self.workers = workers
+        self.cache: Optional[TextractResponseCache] = TextractResponseCache(cache_dir) if cache_dir else None
+        self.s3_bucket: str = s3_bucket if s3_bucket else ""
+        self.visualize = visualize
+        self.skip_blank = skip_blank
+        self.output_dir: Path = Path(__file__).parent.parent.joinpath(OUTPUT_FOLDER).resolve()
+        self.output_dir.mkdir(exist_ok=True)
 
     def process_file(self) -> None:
         """
@@ -90,7 +101,9 @@ class AutotagUsingAmazonTextractRecognition:
         total_progress_count: int = (
             PROGRESS_FIRST_STEP + PROGRESS_SECOND_STEP + PROGRESS_THIRD_STEP + PROGRESS_FOURTH_STEP
         )
-        with tqdm(total=total_progress_count) as progress_bar:
+        # Progress is parsed from output by PDFix, when it is not terminal (e.g. log file) print it less often
+        progress_interval: float = 0.1 if sys.stderr.isatty() else PROGRESS_NON_TTY_INTERVAL
+        with tqdm(total=total_progress_count, mininterval=progress_interval) as progress_bar:
             progress_bar.set_description("Initializing")
 
             id: str = Path(self.input_path_str).stem
@@ -115,20 +128,10 @@ class AutotagUsingAmazonTextractRecognition:
             progress_bar.set_description("Processing pages")
             step_count: float = float(PROGRESS_SECOND_STEP) / number_of_pages
 
-            for page_index in range(number_of_pages):
-                # Acquire the page
-                page: Optional[PdfPage] = doc.AcquirePage(page_index)
-                if page is None:
-                    raise PdfixFailedToTagException(pdfix, "Failed to acquire the page")
-
-                try:
-                    self._process_pdf_file_page(
-                        pdfix, id, page, page_index, template_json_creator, progress_bar, step_count
-                    )
-                except Exception:
-                    raise
-                finally:
-                    page.Release()
+            if self.s3_bucket and number_of_pages > 1:
+                self._process_pdf_file_pages_using_job(id, doc, pdfix, template_json_creator, progress_bar)
+            else:
+                self._process_pdf_file_pages(id, doc, pdfix, template_json_creator, progress_bar, step_count)
 
             progress_bar.n = PROGRESS_FIRST_STEP + PROGRESS_SECOND_STEP
             progress_bar.set_description("Saving template")
@@ -137,17 +140,19 @@ class AutotagUsingAmazonTextractRecognition:
             # Create template for whole document
             template_json_dict: dict = template_json_creator.create_json_dict_for_document(self.zoom)
 
+            # Serialize template once, same data are saved to file and loaded by PDFix SDK
+            template_data: bytes = orjson.dumps(template_json_dict)
+
             # Save template to file
-            template_path: Path = Path(__file__).parent.parent.joinpath("output/{id}-template_json.json").resolve()
-            with open(template_path, "w") as file:
-                file.write(json.dumps(template_json_dict, indent=2))
+            template_path: Path = self.output_dir.joinpath(f"{id}-template_json.json")
+            template_path.write_bytes(template_data)
 
             progress_bar.n = PROGRESS_FIRST_STEP + PROGRESS_SECOND_STEP + PROGRESS_THIRD_STEP
             progress_bar.set_description("Autotagging document")
             progress_bar.refresh()
 
             # Autotag document
-            self._autotag_using_template(doc, template_json_dict, pdfix)
+            self._autotag_using_template(doc, template_data, pdfix)
 
             # Save the processed document
             if not doc.Save(self.output_path_str, kSaveFull):
@@ -157,112 +162,42 @@ class AutotagUsingAmazonTextractRecognition:
             progress_bar.set_description("Done")
             progress_bar.refresh()
 
-    def _process_pdf_file_page(
-        self,
-        pdfix: Pdfix,
-        id: str,
-        page: PdfPage,
-        page_index: int,
-        templateJsonCreator: TemplateJsonCreator,
-        progress_bar: tqdm,
-        total_units_for_page_processing: float,
-    ) -> None:
+    def _save_debug_output(self, id: str, page_number: int, page_view: PdfPageView, result: Document) -> None:
         """
-        Create template json for current PDF document page.
+        Save visualization and conversion of Amazon Textract results for current PDF document page.
 
         Args:
-            pdfix (Pdfix): Pdfix SDK.
             id (string): PDF document name.
-            page (PdfPage): The PDF document page to process.
-            page_index (int): PDF file page index.
-            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
-            progress_bar (tqdm): Progress bar.
-            total_units_for_page_processing (float): How many units progress bar needs to update.
+            page_number (int): PDF file page number.
+            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            result (Document): The result of the layout analysis.
         """
-        page_number: int = page_index + 1
+        # Pages analyzed by asynchronous job do not carry rendered image
+        if result.pages[0].image is not None:
+            # Visualization libraries are loaded only when they are used
+            import cv2
+            import numpy as np
 
-        render_step_units: float = total_units_for_page_processing * PERCENT_RENDER
-        ai_step_units: float = total_units_for_page_processing * PERCENT_AI
-        template_step_units: float = total_units_for_page_processing * PERCENT_TEMPLATE
+            from visualisation import VisualizeAmazonResults
 
-        # Define zoom level and rotation for rendering the page
-        page_view: Optional[PdfPageView] = page.AcquirePageView(self.zoom, kRotate0)
-        if page_view is None:
-            raise PdfixFailedToTagException(pdfix, "Failed to acquire the page view")
-
-        try:
-            with tempfile.NamedTemporaryFile(suffix=".jpg") as temp_file:
-                # Render the page as an image
-                render_page(pdfix, page, page_view, cast(BinaryIO, temp_file))
-                progress_bar.update(render_step_units)
-                temp_image_path: str = temp_file.name
-
-                # Run layout analysis
-                result: Document = process_image(
-                    self.aws_access_key_id, self.aws_secret_access_key, self.aws_region, temp_image_path
-                )
-                progress_bar.update(ai_step_units)
-
-                # # Store image for saving results
-                # image: cv2.typing.MatLike = cv2.imread(temp_image_path)
-
-                # # Custom visualization of the results
-                # custom_visualizer: VisualizeAmazonResults = VisualizeAmazonResults(result, image, id, page_number)
-                # custom_visualizer.visualize(page_view)
-
-                # # Amazon built-in visualization
-                # self._visualize_page(result, id, page_number)
-
-                # Custom conversion to dict and saving to json file
-                convertor: ConvertDocumentToDictionary = ConvertDocumentToDictionary(result, id, page_number)
-                convertor.save_as_json()
-
-                # Process the results
-                templateJsonCreator.process_page(result, page_number, page_view)
-                progress_bar.update(template_step_units)
-        except Exception:
-            raise
-        finally:
-            page_view.Release()
+            # Store image for saving results
+            image: cv2.typing.MatLike = cv2.cvtColor(np.asarray(result.pages[0].image), cv2.COLOR_RGB2BGR)
 
-    def _visualize_page(
-        self,
-        document: Document,
-        id: str,
-        page_number: int,
-    ) -> None:
-        """
-        Visualize the results of the layout analysis on the PDF page.
+            # Custom visualization of the results
+            custom_visualizer: VisualizeAmazonResults = VisualizeAmazonResults(
+                result, image, id, page_number, self.output_dir
+            )
+            custom_visualizer.visualize(page_view)
 
-        Args:
-            document (Document): The result of the layout analysis.
-            id (str): PDF document name.
-            page_number (int): PDF file page number.
-        """
-        images: Any = document.layouts.visualize(True, False, True, 0.5)
+        super()._save_debug_output(id, page_number, page_view, result)
 
-        if isinstance(images, Image.Image):
-            image_path: Path = (
-                Path(__file__).parent.joinpath(f"../output/{id}-{page_number}-aws_result_0.jpg").resolve()
-            )
-            images.save(image_path)
-        elif isinstance(images, list) and len(images) > 0:
-            for index, image in enumerate(images):
-                if isinstance(image, Image.Image):
-                    image_path = (
-                        Path(__file__).parent.joinpath(f"../output/{id}-{page_number}-aws_result_{index}.jpg").resolve()
-                    )
-                    image.save(image_path)
-                else:
-                    print(f"Expected Image and instead got: {type(images)}")
-
-    def _autotag_using_template(self, doc: PdfDoc, template_json_dict: dict, pdfix: Pdfix) -> None:
+    def _autotag_using_template(self, doc: PdfDoc, template_data: bytes, pdfix: Pdfix) -> None:
         """
         Autotag opened document using template and remove previous tags and structures.
 
         Args:
             doc (PdfDoc): Opened document to tag.
-            template_json_dict (dict): Template for tagging.
+            template_data (bytes): UTF-8 encoded template JSON for tagging.
             pdfix (Pdfix): Pdfix SDK.
         """
         # Remove old structure and prepare an empty structure tree
@@ -277,15 +212,13 @@ class AutotagUsingAmazonTextractRecognition:
             raise PdfixFailedToTagException(pdfix, "Failed to create memory stream")
 
         try:
-            raw_data, raw_data_size = json_to_raw_data(template_json_dict)
+            raw_data, raw_data_size = bytes_to_raw_data(template_data)
             if not memory_stream.Write(0, raw_data, raw_data_size):
                 raise PdfixFailedToTagException(pdfix, "Failed to write template data into memory")
 
             doc_template: PdfDocTemplate = doc.GetTemplate()
             if not doc_template.LoadFromStream(memory_stream, kDataFormatJson):
                 raise PdfixFailedToTagException(pdfix, "Failed to save template into document")
-        except Exception:
-            raise
         finally:
             memory_stream.Destroy()
 
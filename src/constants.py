@@ -1,11 +1,21 @@
+from pathlib import Path
+
 CONFIG_FILE: str = "config.json"
+CONFIG_PATH: Path = Path(__file__).parent.parent.joinpath(CONFIG_FILE).resolve()  # Resolved once for all readers
 DOCKER_NAMESPACE: str = "pdfix"
 DOCKER_REPOSITORY: str = "autotag-textract"
 DOCKER_IMAGE: str = f"{DOCKER_NAMESPACE}/{DOCKER_REPOSITORY}"
+JPEG_QUALITY: int = 85  # Quality of rendered page images, higher quality does not improve Amazon Textract results
+MAX_RENDER_DPI: float = 200.0  # Amazon Textract does not benefit from higher resolution of rendered pages
+MAX_RENDER_PIXELS: float = 10_000_000  # Large pages are rendered with lower DPI so image does not exceed this size
+OUTPUT_FOLDER: str = "output"  # Folder for template and debugging outputs, relative to the application folder
 PERCENT_AI: float = 0.8
 PERCENT_RENDER: float = 0.1
 PERCENT_TEMPLATE: float = 0.1
 PROGRESS_FIRST_STEP: int = 10  # Initialize (open document, read page count, etc.)
 PROGRESS_FOURTH_STEP: int = 80  # Autotagging and saving document/data
+PROGRESS_NON_TTY_INTERVAL: float = 1.0  # Minimal seconds between progress updates when output is not terminal
 PROGRESS_SECOND_STEP: int = 900  # Run AI heavy workload (+ rendering + template conversion)
 PROGRESS_THIRD_STEP: int = 10  # Save template or prepare it for autotagging
+UPDATE_CHECK_REQUEST_TIMEOUT: float = 3.0  # Seconds to wait for Docker Hub when checking for new image version
+UPDATE_CHECK_WAIT_TIMEOUT: float = 0.5  # Seconds to wait at exit for update check that is not finished yet
@@ -1,9 +1,9 @@
-import json
 import sys
 import traceback
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
 
+import orjson
 from textractor.data.constants import (
     LAYOUT_LIST,
     LAYOUT_TABLE,
@@ -15,13 +15,16 @@ from textractor.entities.page import Page
 from textractor.entities.table import Table
 from textractor.entities.table_cell import TableCell
 
+# Only children of these layouts are converted, other layouts contain only lines of text
+LAYOUTS_WITH_CHILDREN: frozenset[str] = frozenset({LAYOUT_TABLE, LAYOUT_LIST})
+
 
 class ConvertDocumentToDictionary:
     """
     Converts a Amazon Textract Document to a dictionary and save it as json.
     """
 
-    def __init__(self, document: Document, id: str, page_number: int) -> None:
+    def __init__(self, document: Document, id: str, page_number: int, output_dir: Path) -> None:
         """
         Initializes the ConvertDocumentToDictionary instance.
 
@@ -29,10 +32,19 @@ class ConvertDocumentToDictionary:
             document (Document): The document to be converted.
             id (str): PDF document name.
             page_number (int): PDF file page number.
+            output_dir (Path): Folder where JSON file is saved.
         """
         self.document: Document = document
         self.id: str = id
         self.page_number: int = page_number
+        self.output_dir: Path = output_dir
+
+        # Converted bounding boxes by their identity, entities of document keep their bounding boxes alive
+        # so identity is not reused while converting
+        self.bbox_cache: dict[int, dict] = {}
+
+        # Objects waiting for conversion with container and key where converted object is stored
+        self.pending_objects: list[tuple[Any, Any, Any]] = []
 
     def save_as_json(self) -> None:
         """
@@ -40,84 +52,159 @@ class ConvertDocumentToDictionary:
         """
         try:
             dictionary: dict = self._convert()
-            path: Path = Path(__file__).parent.parent.joinpath(f"output/{self.id}-{self.page_number}.json").resolve()
+            path: Path = self.output_dir.joinpath(f"{self.id}-{self.page_number}.json")
 
-            with open(path, "w", encoding="utf-8") as result_file:
-                json.dump(dictionary, result_file, indent=2)
+            path.write_bytes(orjson.dumps(dictionary))
         except Exception as e:
             print(traceback.format_exc(), file=sys.stderr)
             print(f"Failed to save custom dictionary conversion of Amazon Textract data: {e}", file=sys.stderr)
 
     def _convert(self) -> dict:
         """
-        Convert the document to a dictionary format.
+        Convert the document to a dictionary format. Document tree is walked using explicit stack, converters
+        create containers with empty slots for children and schedule children for conversion.
+        """
+        root: list = [None]
+        self.pending_objects.append((self.document, root, 0))
+
+        # Bound once as they are used for every converted object
+        pending_objects: list[tuple[Any, Any, Any]] = self.pending_objects
+        convert_object: Callable[[Any], Any] = self._convert_object
+
+        while pending_objects:
+            object_to_convert, container, key = pending_objects.pop()
+            container[key] = convert_object(object_to_convert)
+
+        return root[0]
+
+    def _schedule_items(self, items: list) -> list:
+        """
+        Schedule conversion of items into slots of new list.
+
+        Args:
+            items (list): Items to convert.
+
+        Returns:
+            List with empty slots that are filled when items are converted.
+        """
+        converted_items: list = [None] * len(items)
+        self.pending_objects.extend((item, converted_items, index) for index, item in enumerate(items))
+        return converted_items
+
+    def _convert_object(self, object_to_convert: Any) -> Any:
         """
-        return self._convert_object(self.document, True)
-
-    def _convert_object(self, object_to_convert: Any, include_children: bool = True) -> Any:
-        if isinstance(object_to_convert, BoundingBox):
-            return {
-                "x": object_to_convert.x,
-                "y": object_to_convert.y,
-                "width": object_to_convert.width,
-                "height": object_to_convert.height,
-            }
-
-        if isinstance(object_to_convert, Document):
-            return {
-                "pages": [self._convert_object(page) for page in object_to_convert.pages],
-            }
-
-        if isinstance(object_to_convert, Page):
-            return {
-                "layout": [self._convert_object(layout) for layout in object_to_convert.layouts],
-            }
-
-        if isinstance(object_to_convert, Layout):
-            result = {
-                "bbox": self._convert_object(object_to_convert.bbox),
-                "layout_type": object_to_convert.layout_type,
-                "confidence": object_to_convert.confidence,
-            }
-            if include_children:
-                if object_to_convert.layout_type == LAYOUT_TABLE or object_to_convert.layout_type == LAYOUT_LIST:
-                    result["children"] = [self._convert_object(child) for child in object_to_convert.children]
-            return result
-
-        if isinstance(object_to_convert, Table):
-            return {
-                "column_count": object_to_convert.column_count,
-                "row_count": object_to_convert.row_count,
-                "bbox": self._convert_object(object_to_convert.bbox),
-                "children": [self._convert_object(child) for child in object_to_convert.children],
-            }
-
-        if isinstance(object_to_convert, TableCell):
-            return {
-                "col_index": object_to_convert.col_index,
-                "row_index": object_to_convert.row_index,
-                "col_span": object_to_convert.col_span,
-                "row_span": object_to_convert.row_span,
-                "bbox": self._convert_object(object_to_convert.bbox),
-                "text": object_to_convert.text,
-                "confidence": object_to_convert.confidence,
-                "is_column_header": object_to_convert.is_column_header,
-                "is_title": object_to_convert.is_title,
-                "is_summary": object_to_convert.is_summary,
-            }
-
-        if isinstance(object_to_convert, dict):
-            return {key: self._convert_object(value, include_children) for key, value in object_to_convert.items()}
-
-        if isinstance(object_to_convert, list):
-            return [self._convert_object(item) for item in object_to_convert]
-
-        if (
-            isinstance(object_to_convert, int)
-            or isinstance(object_to_convert, float)
-            or isinstance(object_to_convert, str)
-            or isinstance(object_to_convert, bool)
-        ):
-            return object_to_convert
-        else:
-            return str(type(object_to_convert))
+        Convert any object of the document to a dictionary format using converter registered for its type.
+
+        Args:
+            object_to_convert (Any): Object to convert.
+
+        Returns:
+            Converted object.
+        """
+        object_type: type = type(object_to_convert)
+        converter: Optional[Converter] = CONVERTERS.get(object_type)
+        if converter is None:
+            converter = _resolve_converter(object_type)
+        return converter(self, object_to_convert)
+
+    def _convert_bbox(self, bbox: BoundingBox) -> dict:
+        key: int = id(bbox)
+        cached: Optional[dict] = self.bbox_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result: dict = {
+            "x": bbox.x,
+            "y": bbox.y,
+            "width": bbox.width,
+            "height": bbox.height,
+        }
+        self.bbox_cache[key] = result
+        return result
+
+    def _convert_document(self, document: Document) -> dict:
+        return {
+            "pages": self._schedule_items(document.pages),
+        }
+
+    def _convert_page(self, page: Page) -> dict:
+        return {
+            "layout": self._schedule_items(page.layouts),
+        }
+
+    def _convert_layout(self, layout: Layout) -> dict:
+        layout_type: str = layout.layout_type
+        result = {
+            "bbox": self._convert_object(layout.bbox),
+            "layout_type": layout_type,
+            "confidence": layout.confidence,
+        }
+        if layout_type in LAYOUTS_WITH_CHILDREN:
+            result["children"] = self._schedule_items(layout.children)
+        return result
+
+    def _convert_table(self, table: Table) -> dict:
+        return {
+            "column_count": table.column_count,
+            "row_count": table.row_count,
+            "bbox": self._convert_object(table.bbox),
+            "children": self._schedule_items(table.children),
+        }
+
+    def _convert_table_cell(self, cell: TableCell) -> dict:
+        return {
+            "col_index": cell.col_index,
+            "row_index": cell.row_index,
+            "col_span": cell.col_span,
+            "row_span": cell.row_span,
+            "bbox": self._convert_object(cell.bbox),
+            "text": cell.text,
+            "confidence": cell.confidence,
+            "is_column_header": cell.is_column_header,
+            "is_title": cell.is_title,
+            "is_summary": cell.is_summary,
+        }
+
+    def _convert_value(self, value: Any) -> Any:
+        return value
+
+    def _convert_unknown(self, unknown: Any) -> str:
+        return str(type(unknown))
+
+
+Converter = Callable[[ConvertDocumentToDictionary, Any], Any]
+
+# Converters for exact types, dispatching on type avoids chain of isinstance checks for each converted object.
+# Subclasses are resolved through their MRO on first use and cached here.
+CONVERTERS: dict[type, Converter] = {
+    BoundingBox: ConvertDocumentToDictionary._convert_bbox,
+    Document: ConvertDocumentToDictionary._convert_document,
+    Page: ConvertDocumentToDictionary._convert_page,
+    Layout: ConvertDocumentToDictionary._convert_layout,
+    Table: ConvertDocumentToDictionary._convert_table,
+    TableCell: ConvertDocumentToDictionary._convert_table_cell,
+    int: ConvertDocumentToDictionary._convert_value,
+    float: ConvertDocumentToDictionary._convert_value,
+    str: ConvertDocumentToDictionary._convert_value,
+    bool: ConvertDocumentToDictionary._convert_value,
+}
+
+
+def _resolve_converter(object_type: type) -> Converter:
+    """
+    Find converter for type that is not registered directly, e.g. subclass of registered type.
+
+    Args:
+        object_type (type): Type of converted object.
+
+    Returns:
+        Converter of the nearest registered base class or converter returning name of the type.
+    """
+    converter: Converter = ConvertDocumentToDictionary._convert_unknown
+    for base_type in object_type.__mro__[1:]:
+        if base_type in CONVERTERS:
+            converter = CONVERTERS[base_type]
+            break
+
+    CONVERTERS[object_type] = converter
+    return converter
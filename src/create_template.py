@@ -1,37 +1,37 @@
-import json
-import tempfile
+import sys
 from pathlib import Path
-from typing import BinaryIO, Optional, cast
+from typing import Optional
 
+import orjson
 from pdfixsdk import (
     GetPdfix,
     PdfDoc,
     Pdfix,
-    PdfPage,
-    PdfPageView,
-    kRotate0,
 )
-from textractor.entities.document import Document
 from tqdm import tqdm
 
-from ai import process_image
 from constants import (
-    PERCENT_AI,
-    PERCENT_RENDER,
-    PERCENT_TEMPLATE,
+    OUTPUT_FOLDER,
     PROGRESS_FIRST_STEP,
     PROGRESS_FOURTH_STEP,
+    PROGRESS_NON_TTY_INTERVAL,
     PROGRESS_SECOND_STEP,
     PROGRESS_THIRD_STEP,
 )
-from convertor import ConvertDocumentToDictionary
-from exceptions import PdfixFailedToCreateTemplateException, PdfixFailedToOpenException, PdfixInitializeException
-from page_renderer import render_page
+from exceptions import (
+    PdfixFailedToCreateTemplateException,
+    PdfixFailedToOpenException,
+    PdfixInitializeException,
+)
+from pages_processor import AmazonTextractPagesProcessor
 from template_json import TemplateJsonCreator
+from textract_cache import TextractResponseCache
 from utils_sdk import authorize_sdk
 
 
-class CreateTemplateJsonUsingAmazonTextract:
+class CreateTemplateJsonUsingAmazonTextract(AmazonTextractPagesProcessor):
+    pdfix_exception = PdfixFailedToCreateTemplateException
+
     def __init__(
         self,
         aws_access_key_id: str,
@@ -42,6 +42,11 @@ class CreateTemplateJsonUsingAmazonTextract:
         input_path: str,
         output_path: str,
         zoom: float,
+        workers: int,
+        cache_dir: Optional[str],
+        s3_bucket: Optional[str],
+        visualize: bool,
+        skip_blank: bool,
     ) -> None:
         """
         Initialize class for tagging pdf(s).
@@ -55,6 +60,11 @@ class CreateTemplateJsonUsingAmazonTextract:
             input_path (str): Path to PDF document.
             output_path (str): Path where template JSON should be saved.
             zoom (float): Zoom level for rendering the page.
+            workers (int): Number of pages sent to Amazon Textract at the same time.
+            cache_dir (Optional[str]): Directory for caching Amazon Textract responses.
+            s3_bucket (Optional[str]): S3 bucket for analyzing whole document by one asynchronous Textract job.
+            visualize (bool): Whether to save conversions of Amazon Textract results.
+            skip_blank (bool): Whether to skip Amazon Textract analysis of pages without any content.
         """
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
@@ -64,6 +74,14 @@ class CreateTemplateJsonUsingAmazonTextract:
         self.input_path_str = input_path
         self.output_path_str = output_path
         self.zoom = zoom
+        self.workers = workers
+        self.cache: Optional[TextractResponseCache] = TextractResponseCache(cache_dir) if cache_dir else None
+        self.s3_bucket: str = s3_bucket if s3_bucket else ""
+        self.visualize = visualize
+        self.skip_blank = skip_blank
+        self.output_dir: Path = Path(__file__).parent.parent.joinpath(OUTPUT_FOLDER).resolve()
+        if visualize:
+            self.output_dir.mkdir(exist_ok=True)
 
     def process_file(self) -> None:
         """
@@ -72,7 +90,9 @@ class CreateTemplateJsonUsingAmazonTextract:
         total_progress_count: int = (
             PROGRESS_FIRST_STEP + PROGRESS_SECOND_STEP + PROGRESS_THIRD_STEP + PROGRESS_FOURTH_STEP
         )
-        with tqdm(total=total_progress_count) as progress_bar:
+        # Progress is parsed from output by PDFix, when it is not terminal (e.g. log file) print it less often
+        progress_interval: float = 0.1 if sys.stderr.isatty() else PROGRESS_NON_TTY_INTERVAL
+        with tqdm(total=total_progress_count, mininterval=progress_interval) as progress_bar:
             progress_bar.set_description("Initializing")
 
             id: str = Path(self.input_path_str).stem
@@ -97,20 +117,10 @@ class CreateTemplateJsonUsingAmazonTextract:
             progress_bar.set_description("Processing pages")
             step_count: float = float(PROGRESS_SECOND_STEP) / number_of_pages
 
-            for page_index in range(number_of_pages):
-                # Acquire the page
-                page: Optional[PdfPage] = doc.AcquirePage(page_index)
-                if page is None:
-                    raise PdfixFailedToCreateTemplateException(pdfix, "Unable to acquire the page")
-
-                try:
-                    self._process_pdf_file_page(
-                        pdfix, id, page, page_index, template_json_creator, progress_bar, step_count
-                    )
-                except Exception:
-                    raise
-                finally:
-                    page.Release()
+            if self.s3_bucket and number_of_pages > 1:
+                self._process_pdf_file_pages_using_job(id, doc, pdfix, template_json_creator, progress_bar)
+            else:
+                self._process_pdf_file_pages(id, doc, pdfix, template_json_creator, progress_bar, step_count)
 
             progress_bar.n = PROGRESS_FIRST_STEP + PROGRESS_SECOND_STEP
             progress_bar.set_description("Saving template")
@@ -118,71 +128,10 @@ class CreateTemplateJsonUsingAmazonTextract:
 
             # Create template for whole document
             template_json_dict: dict = template_json_creator.create_json_dict_for_document(self.zoom)
-            output_data: dict = template_json_dict
 
             # Save template json
-            with open(self.output_path_str, "w") as file:
-                file.write(json.dumps(output_data, indent=2))
+            Path(self.output_path_str).write_bytes(orjson.dumps(template_json_dict, option=orjson.OPT_INDENT_2))
 
             progress_bar.n = total_progress_count
             progress_bar.set_description("Done")
             progress_bar.refresh()
-
-    def _process_pdf_file_page(
-        self,
-        pdfix: Pdfix,
-        id: str,
-        page: PdfPage,
-        page_index: int,
-        templateJsonCreator: TemplateJsonCreator,
-        progress_bar: tqdm,
-        total_units_for_page_processing: float,
-    ) -> None:
-        """
-        Create template json for current PDF document page.
-
-        Args:
-            pdfix (Pdfix): Pdfix SDK.
-            id (string): PDF document name.
-            page (PdfPage): The PDF document page to process.
-            page_index (int): PDF file page index.
-            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
-            progress_bar (tqdm): Progress bar.
-            total_units_for_page_processing (float): How many units progress bar needs to update.
-        """
-        page_number: int = page_index + 1
-
-        render_step_units: float = total_units_for_page_processing * PERCENT_RENDER
-        ai_step_units: float = total_units_for_page_processing * PERCENT_AI
-        template_step_units: float = total_units_for_page_processing * PERCENT_TEMPLATE
-
-        # Define rotation for rendering the page
-        page_view: Optional[PdfPageView] = page.AcquirePageView(self.zoom, kRotate0)
-        if page_view is None:
-            raise PdfixFailedToCreateTemplateException(pdfix, "Unable to acquire page view")
-
-        try:
-            with tempfile.NamedTemporaryFile(suffix=".jpg") as temp_file:
-                # Render the page as an image
-                render_page(pdfix, page, page_view, cast(BinaryIO, temp_file))
-                progress_bar.update(render_step_units)
-                temp_image_path: str = temp_file.name
-
-                # Run layout analysis
-                result: Document = process_image(
-                    self.aws_access_key_id, self.aws_secret_access_key, self.aws_region, temp_image_path
-                )
-                progress_bar.update(ai_step_units)
-
-                # Custom conversion to dict and saving to json file
-                convertor: ConvertDocumentToDictionary = ConvertDocumentToDictionary(result, id, page_number)
-                convertor.save_as_json()
-
-                # Process the results
-                templateJsonCreator.process_page(result, page_number, page_view)
-                progress_bar.update(template_step_units)
-        except Exception:
-            raise
-        finally:
-            # Release resources
-            page_view.Release()
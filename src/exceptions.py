@@ -4,6 +4,7 @@ EC_ARG_GENERAL = 10
 EC_ARG_ZOOM = 11
 EC_ARG_INPUT_PDF_OUTPUT_JSON = 12
 EC_ARG_INPUT_PDF_OUTPUT_PDF = 13
+EC_ARG_WORKERS = 14
 
 EC_PDFIX_INITIALIZE = 20
 EC_PDFIX_ACTIVATION_FAILED = 21
@@ -23,6 +24,7 @@ MESSAGE_ARG_GENERAL = "Failed to parse arguments. Please check the usage and try
 MESSAGE_ARG_ZOOM = "Zoom level must between 1.0 and 10.0."
 MESSAGE_ARG_INPUT_PDF_OUTPUT_JSON = "Input file must be PDF document and output file must be JSON."
 MESSAGE_ARG_INPUT_PDF_OUTPUT_PDF = "Input and output file must be PDF documents."
+MESSAGE_ARG_WORKERS = "Number of workers must be between 1 and 32."
 
 MESSAGE_PDFIX_INITIALIZE = "Failed to initialize PDFix SDK."
 MESSAGE_PDFIX_ACTIVATION_FAILED = "Failed to activate PDFix SDK acount."
@@ -69,6 +71,11 @@ class ArgumentInputPdfOutputPdfException(ArgumentException):
         super().__init__(MESSAGE_ARG_INPUT_PDF_OUTPUT_PDF, EC_ARG_INPUT_PDF_OUTPUT_PDF)
 
 
+class ArgumentWorkersException(ArgumentException):
+    def __init__(self) -> None:
+        super().__init__(MESSAGE_ARG_WORKERS, EC_ARG_WORKERS)
+
+
 class PdfixInitializeException(ExpectedException):
     def __init__(self) -> None:
         super().__init__(EC_PDFIX_INITIALIZE)
@@ -1,20 +1,19 @@
 import argparse
+import shutil
 import sys
 import threading
 import time
 import traceback
 from datetime import datetime
-from pathlib import Path
 from typing import Optional
 
-from autotag import AutotagUsingAmazonTextractRecognition
-from constants import CONFIG_FILE
-from create_template import CreateTemplateJsonUsingAmazonTextract
+from constants import CONFIG_PATH, UPDATE_CHECK_WAIT_TIMEOUT
 from exceptions import (
     EC_ARG_GENERAL,
     MESSAGE_ARG_GENERAL,
     ArgumentInputPdfOutputJsonException,
     ArgumentInputPdfOutputPdfException,
+    ArgumentWorkersException,
     ArgumentZoomException,
     ExpectedException,
 )
@@ -41,6 +40,23 @@ def set_arguments(
                 parser.add_argument("--aws_secret", type=str, required=True, help="AWS Secret Access Key.")
             case "aws-region":
                 parser.add_argument("--aws_region", type=str, required=True, help="AWS Region.")
+            case "aws-s3-bucket":
+                parser.add_argument(
+                    "--aws_s3_bucket",
+                    type=str,
+                    default="",
+                    nargs="?",
+                    help="S3 bucket for analyzing whole document by one asynchronous Amazon Textract job. "
+                    + "Each page is sent separately if not provided.",
+                )
+            case "cache-dir":
+                parser.add_argument(
+                    "--cache_dir",
+                    type=str,
+                    default="",
+                    nargs="?",
+                    help="Directory for caching Amazon Textract responses. Caching is disabled if not provided.",
+                )
             case "input":
                 parser.add_argument("--input", "-i", type=str, required=True, help="The input PDF file.")
             case "key":
@@ -49,6 +65,25 @@ def set_arguments(
                 parser.add_argument("--name", type=str, default="", nargs="?", help="PDFix license name.")
             case "output":
                 parser.add_argument("--output", "-o", type=str, required=required_output, help=output_help)
+            case "skip-blank":
+                parser.add_argument(
+                    "--skip_blank",
+                    action="store_true",
+                    help="Do not send pages without any content to Amazon Textract.",
+                )
+            case "visualize":
+                parser.add_argument(
+                    "--visualize",
+                    action="store_true",
+                    help="Save visualizations and conversions of Amazon Textract results into output folder.",
+                )
+            case "workers":
+                parser.add_argument(
+                    "--workers",
+                    type=int,
+                    default=4,
+                    help="Number of pages processed by Amazon Textract at the same time (default: 4).",
+                )
             case "zoom":
                 parser.add_argument(
                     "--zoom", type=float, default=2.0, help="Zoom level for the PDF page rendering (default: 2.0)."
@@ -67,19 +102,27 @@ def get_pdfix_config(path: str) -> None:
     Args:
         path (string): Destination path for config.json file
     """
-    config_path: Path = Path(__file__).parent.parent.joinpath(CONFIG_FILE)
-
-    with open(config_path, "r", encoding="utf-8") as file:
-        if path is None:
-            print(file.read())
-        else:
-            with open(path, "w") as out:
-                out.write(file.read())
+    if path is None:
+        print(CONFIG_PATH.read_text(encoding="utf-8"))
+    else:
+        shutil.copyfile(CONFIG_PATH, path)
 
 
 def run_autotag_subcommand(args) -> None:
     autotagging_pdf(
-        args.aws_id, args.aws_secret, args.aws_region, args.name, args.key, args.input, args.output, args.zoom
+        args.aws_id,
+        args.aws_secret,
+        args.aws_region,
+        args.name,
+        args.key,
+        args.input,
+        args.output,
+        args.zoom,
+        args.workers,
+        args.cache_dir,
+        args.aws_s3_bucket,
+        args.visualize,
+        args.skip_blank,
     )
 
 
@@ -92,6 +135,11 @@ def autotagging_pdf(
     input_path: str,
     output_path: str,
     zoom: float,
+    workers: int,
+    cache_dir: Optional[str],
+    s3_bucket: Optional[str],
+    visualize: bool,
+    skip_blank: bool,
 ) -> None:
     """
     Autotagging PDF document with provided arguments
@@ -105,11 +153,22 @@ def autotagging_pdf(
         input_path (str): Path to PDF document.
         output_path (str): Path to PDF document.
         zoom (float): Zoom level for rendering the page.
+        workers (int): Number of pages processed by Amazon Textract at the same time.
+        cache_dir (Optional[str]): Directory for caching Amazon Textract responses.
+        s3_bucket (Optional[str]): S3 bucket for analyzing whole document by one asynchronous Textract job.
+        visualize (bool): Whether to save visualizations and conversions of Amazon Textract results.
+        skip_blank (bool): Whether to skip Amazon Textract analysis of pages without any content.
     """
     if zoom < 1.0 or zoom > 10.0:
         raise ArgumentZoomException()
 
+    if workers < 1 or workers > 32:
+        raise ArgumentWorkersException()
+
     if input_path.lower().endswith(".pdf") and output_path.lower().endswith(".pdf"):
+        # Imported here as loading Amazon Textract libraries is slow and not needed by other commands
+        from autotag import AutotagUsingAmazonTextractRecognition
+
         autotag = AutotagUsingAmazonTextractRecognition(
             aws_access_key_id,
             aws_secret_access_key,
@@ -119,6 +178,11 @@ def autotagging_pdf(
             input_path,
             output_path,
             zoom,
+            workers,
+            cache_dir,
+            s3_bucket,
+            visualize,
+            skip_blank,
         )
         autotag.process_file()
     else:
@@ -127,7 +191,19 @@ def autotagging_pdf(
 
 def run_template_subcommand(args) -> None:
     create_template_json(
-        args.aws_id, args.aws_secret, args.aws_region, args.name, args.key, args.input, args.output, args.zoom
+        args.aws_id,
+        args.aws_secret,
+        args.aws_region,
+        args.name,
+        args.key,
+        args.input,
+        args.output,
+        args.zoom,
+        args.workers,
+        args.cache_dir,
+        args.aws_s3_bucket,
+        args.visualize,
+        args.skip_blank,
     )
 
 
@@ -140,6 +216,11 @@ def create_template_json(
     input_path: str,
     output_path: str,
     zoom: float,
+    workers: int,
+    cache_dir: Optional[str],
+    s3_bucket: Optional[str],
+    visualize: bool,
+    skip_blank: bool,
 ) -> None:
     """
     Creating template json for PDF document using provided arguments
@@ -153,11 +234,22 @@ def create_template_json(
         input_path (str): Path to PDF document.
         output_path (str): Path to JSON file.
         zoom (float): Zoom level for rendering the page.
+        workers (int): Number of pages processed by Amazon Textract at the same time.
+        cache_dir (Optional[str]): Directory for caching Amazon Textract responses.
+        s3_bucket (Optional[str]): S3 bucket for analyzing whole document by one asynchronous Textract job.
+        visualize (bool): Whether to save conversions of Amazon Textract results.
+        skip_blank (bool): Whether to skip Amazon Textract analysis of pages without any content.
     """
     if zoom < 1.0 or zoom > 10.0:
         raise ArgumentZoomException()
 
+    if workers < 1 or workers > 32:
+        raise ArgumentWorkersException()
+
     if input_path.lower().endswith(".pdf") and output_path.lower().endswith(".json"):
+        # Imported here as loading Amazon Textract libraries is slow and not needed by other commands
+        from create_template import CreateTemplateJsonUsingAmazonTextract
+
         template_creator = CreateTemplateJsonUsingAmazonTextract(
             aws_access_key_id,
             aws_secret_access_key,
@@ -167,6 +259,11 @@ def create_template_json(
             input_path,
             output_path,
             zoom,
+            workers,
+            cache_dir,
+            s3_bucket,
+            visualize,
+            skip_blank,
         )
         template_creator.process_file()
     else:
@@ -200,7 +297,21 @@ def main() -> None:
     )
     set_arguments(
         autotag_subparser,
-        ["aws-id", "aws-secret", "aws-region", "name", "key", "input", "output", "zoom"],
+        [
+            "aws-id",
+            "aws-secret",
+            "aws-region",
+            "name",
+            "key",
+            "input",
+            "output",
+            "zoom",
+            "workers",
+            "cache-dir",
+            "visualize",
+            "skip-blank",
+            "aws-s3-bucket",
+        ],
         True,
         "The output PDF file.",
     )
@@ -213,7 +324,21 @@ def main() -> None:
     )
     set_arguments(
         template_subparser,
-        ["aws-id", "aws-secret", "aws-region", "name", "key", "input", "output", "zoom"],
+        [
+            "aws-id",
+            "aws-secret",
+            "aws-region",
+            "name",
+            "key",
+            "input",
+            "output",
+            "zoom",
+            "workers",
+            "cache-dir",
+            "visualize",
+            "skip-blank",
+            "aws-s3-bucket",
+        ],
         True,
         "The output JSON file.",
     )
@@ -239,8 +364,9 @@ def main() -> None:
     if hasattr(args, "func"):
         # Check for updates only when help is not checked
         update_checker = DockerImageContainerUpdateChecker()
-        # Check it in separate thread not to be delayed when there is slow or no internet connection
-        update_thread = threading.Thread(target=update_checker.check_for_image_updates)
+        # Check it in separate thread not to be delayed when there is slow or no internet connection,
+        # daemon thread does not keep the program running when the check is not finished
+        update_thread = threading.Thread(target=update_checker.check_for_image_updates, daemon=True)
         update_thread.start()
 
         # Measure the time it takes to make all requests
@@ -265,8 +391,8 @@ def main() -> None:
             current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
             print(f"\nProcessing finished at: {current_time}. Elapsed time: {elapsed_time:.2f} seconds")
 
-            # Make sure to let update thread finish before exiting
-            update_thread.join()
+            # Give update thread short time to finish, do not delay exit on slow connection
+            update_thread.join(timeout=UPDATE_CHECK_WAIT_TIMEOUT)
     else:
         parser.print_help()
 
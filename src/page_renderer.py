@@ -1,4 +1,6 @@
-from typing import BinaryIO
+import ctypes
+import math
+from typing import Optional
 
 from pdfixsdk import (
     PdfImageParams,
@@ -6,15 +8,60 @@ from pdfixsdk import (
     PdfPage,
     PdfPageRenderParams,
     PdfPageView,
+    PdfRect,
+    PdsContent,
     kImageDIBFormatArgb,
     kImageFormatJpg,
-    kPsTruncate,
 )
 
+from constants import JPEG_QUALITY, MAX_RENDER_DPI, MAX_RENDER_PIXELS
 from exceptions import PdfixFailedToRenderException
 
+# PDF user space unit is 1/72 inch, so zoom 1.0 renders page at 72 DPI
+PDF_DPI: float = 72.0
 
-def render_page(pdfix: Pdfix, pdf_page: PdfPage, page_view: PdfPageView, temp_file: BinaryIO) -> None:
+
+def get_render_zoom(zoom: float, pdf_page: PdfPage) -> float:
+    """
+    Limits zoom so page is not rendered in higher resolution than Amazon Textract can use.
+    Large pages are limited also by the total number of rendered pixels.
+
+    Args:
+        zoom (float): Requested zoom level.
+        pdf_page (PdfPage): The page to render.
+
+    Returns:
+        Zoom level used for rendering the page.
+    """
+    render_zoom: float = min(zoom, MAX_RENDER_DPI / PDF_DPI)
+
+    crop_box: PdfRect = pdf_page.GetCropBox()
+    page_area: float = abs(crop_box.right - crop_box.left) * abs(crop_box.top - crop_box.bottom)
+    if page_area > 0:
+        render_zoom = min(render_zoom, math.sqrt(MAX_RENDER_PIXELS / page_area))
+
+    return render_zoom
+
+
+def is_blank_page(pdf_page: PdfPage) -> bool:
+    """
+    Checks whether the PDF page has nothing to analyze. Page is blank if it has no content objects
+    and no annotations.
+
+    Args:
+        pdf_page (PdfPage): The page to check.
+
+    Returns:
+        True if the page is blank.
+    """
+    if pdf_page.GetNumAnnots() > 0:
+        return False
+
+    content: Optional[PdsContent] = pdf_page.GetContent()
+    return content is not None and content.GetNumObjects() == 0
+
+
+def render_page(pdfix: Pdfix, pdf_page: PdfPage, page_view: PdfPageView) -> bytes:
     """
     Renders the PDF page into image
 
@@ -22,10 +69,9 @@ def render_page(pdfix: Pdfix, pdf_page: PdfPage, page_view: PdfPageView, temp_fi
         pdfix (Pdfix): Pdfix SDK.
         pdf_page (PdfPage): The page to render.
         page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
-        temp_file (BinaryIO): File to save image to.
 
     Returns:
-        The path to the rendered image temporary file.
+        The rendered image encoded as JPG.
     """
     # Get the dimensions of the page view (device width and height)
     page_width = page_view.GetDeviceWidth()
@@ -46,26 +92,29 @@ def render_page(pdfix: Pdfix, pdf_page: PdfPage, page_view: PdfPageView, temp_fi
         if not pdf_page.DrawContent(render_params):
             raise PdfixFailedToRenderException(pdfix, "Failed to draw content of page into image")
 
-        # Save the rendered image to a temporary file in JPG format
-        file_stream = pdfix.CreateFileStream(temp_file.name, kPsTruncate)
-        if file_stream is None:
-            raise PdfixFailedToRenderException(pdfix, "Unable to create file stream")
+        # Save the rendered image to a memory stream in JPG format
+        memory_stream = pdfix.CreateMemStream()
+        if memory_stream is None:
+            raise PdfixFailedToRenderException(pdfix, "Unable to create memory stream")
 
         try:
             # Set image parameters (format and quality)
             image_params = PdfImageParams()
             image_params.format = kImageFormatJpg
-            image_params.quality = 100
+            image_params.quality = JPEG_QUALITY
+
+            # Save the image to the memory stream
+            if not page_image.SaveToStream(memory_stream, image_params):
+                raise PdfixFailedToRenderException(pdfix, "Failed to save rendered image to memory")
 
-            # Save the image to the file stream
-            if not page_image.SaveToStream(file_stream, image_params):
-                raise PdfixFailedToRenderException(pdfix, "Failed to save rendered image to temporary file")
+            # Copy encoded image out of the memory stream
+            image_size: int = memory_stream.GetSize()
+            image_data = (ctypes.c_ubyte * image_size)()
+            if not memory_stream.Read(0, image_data, image_size):
+                raise PdfixFailedToRenderException(pdfix, "Failed to read rendered image from memory")
 
-        except Exception:
-            raise
+            return bytes(image_data)
         finally:
-            file_stream.Destroy()
-    except Exception:
-        raise
+            memory_stream.Destroy()
     finally:
         page_image.Destroy()
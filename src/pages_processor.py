@@ -0,0 +1,288 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from pdfixsdk import (
+    PdfDoc,
+    Pdfix,
+    PdfPage,
+    PdfPageView,
+    kRotate0,
+)
+from textractor.entities.document import Document
+from tqdm import tqdm
+
+from ai import create_blank_page_document, process_image, process_pdf_document
+from constants import PERCENT_AI, PERCENT_RENDER, PERCENT_TEMPLATE, PROGRESS_SECOND_STEP
+from convertor import ConvertDocumentToDictionary
+from exceptions import AmazonTextractGenericException, PdfixException
+from page_renderer import get_render_zoom, is_blank_page, render_page
+from template_json import TemplateJsonCreator
+from textract_cache import TextractResponseCache
+
+
+class AmazonTextractPagesProcessor:
+    """
+    Mixin that renders PDF document pages, analyzes them by Amazon Textract and adds results into template json.
+    Used by both autotagging and template creation, they differ only in exception raised when PDFix SDK fails.
+    """
+
+    # Set by class using this mixin
+    aws_access_key_id: str
+    aws_secret_access_key: str
+    aws_region: str
+    input_path_str: str
+    zoom: float
+    workers: int
+    cache: Optional[TextractResponseCache]
+    s3_bucket: str
+    visualize: bool
+    skip_blank: bool
+    output_dir: Path
+    # Exception raised when PDFix SDK fails to process the page, takes PDFix SDK and message
+    pdfix_exception: Callable[[Pdfix, str], PdfixException]
+
+    def _process_pdf_file_pages(
+        self,
+        id: str,
+        doc: PdfDoc,
+        pdfix: Pdfix,
+        templateJsonCreator: TemplateJsonCreator,
+        progress_bar: tqdm,
+        total_units_for_page_processing: float,
+    ) -> None:
+        """
+        Create template json for all PDF document pages, each page is analyzed by separate Amazon Textract request.
+
+        Args:
+            id (string): PDF document name.
+            doc (PdfDoc): Opened PDF document.
+            pdfix (Pdfix): Pdfix SDK.
+            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
+            progress_bar (tqdm): Progress bar.
+            total_units_for_page_processing (float): How many units progress bar needs to update for each page.
+        """
+        # Pages are rendered and converted in this thread as PDFix SDK is not used concurrently.
+        # Only Amazon Textract requests run in the thread pool, next page is rendered while "workers" pages
+        # are analyzed.
+        pending_pages: deque[tuple[int, PdfPage, PdfPageView, Future[Document]]] = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for page_index in range(doc.GetNumPages()):
+                    pending_pages.append(
+                        self._submit_pdf_file_page(
+                            pdfix, doc, page_index, executor, progress_bar, total_units_for_page_processing
+                        )
+                    )
+                    if len(pending_pages) > self.workers:
+                        self._wait_for_pdf_file_page(
+                            id,
+                            pending_pages.popleft(),
+                            templateJsonCreator,
+                            progress_bar,
+                            total_units_for_page_processing,
+                        )
+
+                while pending_pages:
+                    self._wait_for_pdf_file_page(
+                        id, pending_pages.popleft(), templateJsonCreator, progress_bar, total_units_for_page_processing
+                    )
+            finally:
+                # Release pages that were not processed because of failure
+                for _, page, page_view, future in pending_pages:
+                    future.cancel()
+                    page_view.Release()
+                    page.Release()
+
+    def _process_pdf_file_pages_using_job(
+        self,
+        id: str,
+        doc: PdfDoc,
+        pdfix: Pdfix,
+        templateJsonCreator: TemplateJsonCreator,
+        progress_bar: tqdm,
+    ) -> None:
+        """
+        Create template json for all PDF document pages, whole document is analyzed by one asynchronous
+        Amazon Textract job.
+
+        Args:
+            id (string): PDF document name.
+            doc (PdfDoc): Opened PDF document.
+            pdfix (Pdfix): Pdfix SDK.
+            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
+            progress_bar (tqdm): Progress bar.
+        """
+        number_of_pages: int = doc.GetNumPages()
+
+        # Run layout analysis of whole document
+        results: list[Document] = process_pdf_document(
+            self.aws_access_key_id, self.aws_secret_access_key, self.aws_region, self.input_path_str, self.s3_bucket
+        )
+        if len(results) != number_of_pages:
+            raise AmazonTextractGenericException()
+        progress_bar.update(PROGRESS_SECOND_STEP * (PERCENT_RENDER + PERCENT_AI))
+
+        template_step_units: float = PROGRESS_SECOND_STEP * PERCENT_TEMPLATE / number_of_pages
+
+        for page_index, result in enumerate(results):
+            # Acquire the page
+            page: Optional[PdfPage] = doc.AcquirePage(page_index)
+            if page is None:
+                raise self.pdfix_exception(pdfix, "Failed to acquire the page")
+
+            try:
+                # Define zoom level and rotation for converting coordinates
+                page_view: Optional[PdfPageView] = page.AcquirePageView(get_render_zoom(self.zoom, page), kRotate0)
+                if page_view is None:
+                    raise self.pdfix_exception(pdfix, "Failed to acquire the page view")
+
+                try:
+                    self._process_pdf_file_page(id, page_index, page_view, result, templateJsonCreator)
+                    progress_bar.update(template_step_units)
+                finally:
+                    page_view.Release()
+            finally:
+                page.Release()
+
+    def _submit_pdf_file_page(
+        self,
+        pdfix: Pdfix,
+        doc: PdfDoc,
+        page_index: int,
+        executor: ThreadPoolExecutor,
+        progress_bar: tqdm,
+        total_units_for_page_processing: float,
+    ) -> tuple[int, PdfPage, PdfPageView, Future[Document]]:
+        """
+        Render PDF document page into image and submit it for layout analysis.
+
+        Args:
+            pdfix (Pdfix): Pdfix SDK.
+            doc (PdfDoc): Opened PDF document.
+            page_index (int): PDF file page index.
+            executor (ThreadPoolExecutor): Thread pool running Amazon Textract requests.
+            progress_bar (tqdm): Progress bar.
+            total_units_for_page_processing (float): How many units progress bar needs to update.
+
+        Returns:
+            Page index, acquired page, its page view and future with result of layout analysis.
+            Page and page view are released by caller.
+        """
+        render_step_units: float = total_units_for_page_processing * PERCENT_RENDER
+
+        # Acquire the page
+        page: Optional[PdfPage] = doc.AcquirePage(page_index)
+        if page is None:
+            raise self.pdfix_exception(pdfix, "Failed to acquire the page")
+
+        # Define zoom level and rotation for rendering the page
+        page_view: Optional[PdfPageView] = page.AcquirePageView(get_render_zoom(self.zoom, page), kRotate0)
+        if page_view is None:
+            page.Release()
+            raise self.pdfix_exception(pdfix, "Failed to acquire the page view")
+
+        try:
+            future: Future[Document]
+            if self.skip_blank and is_blank_page(page):
+                # Blank page has nothing to analyze
+                future = Future()
+                future.set_result(create_blank_page_document())
+                progress_bar.update(render_step_units)
+            else:
+                # Render the page as an image
+                image: bytes = render_page(pdfix, page, page_view)
+                progress_bar.update(render_step_units)
+
+                # Run layout analysis
+                future = executor.submit(
+                    process_image,
+                    self.aws_access_key_id,
+                    self.aws_secret_access_key,
+                    self.aws_region,
+                    image,
+                    self.cache,
+                )
+        except BaseException:
+            # Application exceptions do not derive from Exception
+            page_view.Release()
+            page.Release()
+            raise
+
+        return page_index, page, page_view, future
+
+    def _wait_for_pdf_file_page(
+        self,
+        id: str,
+        pending_page: tuple[int, PdfPage, PdfPageView, Future[Document]],
+        templateJsonCreator: TemplateJsonCreator,
+        progress_bar: tqdm,
+        total_units_for_page_processing: float,
+    ) -> None:
+        """
+        Wait for layout analysis of submitted PDF document page and create template json for it.
+
+        Args:
+            id (string): PDF document name.
+            pending_page (tuple[int, PdfPage, PdfPageView, Future[Document]]): Page submitted for layout analysis.
+            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
+            progress_bar (tqdm): Progress bar.
+            total_units_for_page_processing (float): How many units progress bar needs to update.
+        """
+        page_index, page, page_view, future = pending_page
+
+        ai_step_units: float = total_units_for_page_processing * PERCENT_AI
+        template_step_units: float = total_units_for_page_processing * PERCENT_TEMPLATE
+
+        try:
+            # Wait for layout analysis
+            result: Document = future.result()
+            progress_bar.update(ai_step_units)
+
+            self._process_pdf_file_page(id, page_index, page_view, result, templateJsonCreator)
+            progress_bar.update(template_step_units)
+        finally:
+            page_view.Release()
+            page.Release()
+
+    def _process_pdf_file_page(
+        self,
+        id: str,
+        page_index: int,
+        page_view: PdfPageView,
+        result: Document,
+        templateJsonCreator: TemplateJsonCreator,
+    ) -> None:
+        """
+        Create template json for current PDF document page.
+
+        Args:
+            id (string): PDF document name.
+            page_index (int): PDF file page index.
+            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            result (Document): The result of the layout analysis.
+            templateJsonCreator (TemplateJsonCreator): Template JSON creator.
+        """
+        page_number: int = page_index + 1
+
+        # Debugging output is written only when requested
+        if self.visualize:
+            self._save_debug_output(id, page_number, page_view, result)
+
+        # Process the results
+        templateJsonCreator.process_page(result, page_number, page_view)
+
+    def _save_debug_output(self, id: str, page_number: int, page_view: PdfPageView, result: Document) -> None:
+        """
+        Save conversion of Amazon Textract results for current PDF document page into json file.
+
+        Args:
+            id (string): PDF document name.
+            page_number (int): PDF file page number.
+            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            result (Document): The result of the layout analysis.
+        """
+        # Custom conversion to dict and saving to json file
+        convertor: ConvertDocumentToDictionary = ConvertDocumentToDictionary(result, id, page_number, self.output_dir)
+        convertor.save_as_json()
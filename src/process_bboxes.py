@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+import numpy as np
 from textractor.entities.document import Document
 from textractor.entities.layout import Layout
 
@@ -10,26 +13,59 @@ def convert_bbox(region: Layout) -> tuple[float, float, float, float]:
     return (x_min, y_min, x_max, y_max)
 
 
-def bboxes_overlaps(region1: Layout, region2: Layout) -> bool:
+class UnionFind:
+    """
+    Disjoint-set of element indexes with path compression and union by rank.
     """
-    Check if two regions overlap.
 
-    Args:
-        region1 (Layout): A region from amazon textract document.
-        region2 (Layout): A region from amazon textract document.
+    def __init__(self, size: int) -> None:
+        """
+        Initialize every element as its own set.
 
-    Returns:
-        True if regions overlap, False otherwise.
-    """
-    x_min_1, y_min_1, x_max_1, y_max_1 = convert_bbox(region1)
-    x_min_2, y_min_2, x_max_2, y_max_2 = convert_bbox(region2)
+        Args:
+            size (int): Number of elements.
+        """
+        self.parent: list[int] = list(range(size))
+        self.rank: list[int] = [0] * size
+
+    def find(self, index: int) -> int:
+        """
+        Find representative of the set containing element.
+
+        Args:
+            index (int): Index of the element.
+
+        Returns:
+            Index of the representative element.
+        """
+        root: int = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        # Point all visited elements directly to the root
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+
+        return root
+
+    def union(self, index1: int, index2: int) -> None:
+        """
+        Merge sets containing both elements.
+
+        Args:
+            index1 (int): Index of the first element.
+            index2 (int): Index of the second element.
+        """
+        root1: int = self.find(index1)
+        root2: int = self.find(index2)
+        if root1 == root2:
+            return
 
-    return not (
-        x_max_1 < x_min_2  # box1 is left of box2
-        or x_min_1 > x_max_2  # box1 is right of box2
-        or y_max_1 < y_min_2  # box1 is above box2
-        or y_min_1 > y_max_2  # box1 is below box2
-    )
+        if self.rank[root1] < self.rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if self.rank[root1] == self.rank[root2]:
+            self.rank[root1] += 1
 
 
 class TextractPostProcessingBBoxes:
@@ -46,6 +82,8 @@ class TextractPostProcessingBBoxes:
             result (Document): Document containing regions with bounding boxes and their scores.
         """
         self.result: Document = result
+        self._bboxes: np.ndarray | None = None
+        self._confidences: list[float] | None = None
 
     def get_list_of_skipping_ids(self) -> list[str]:
         """
@@ -57,51 +95,72 @@ class TextractPostProcessingBBoxes:
         Returns:
             List of region ids which to skip.
         """
-        overlaps: list[tuple[int, int]] = self._find_overlaps()
+        overlaps: np.ndarray = self._find_overlaps()
         overlapping_bboxes_set: set[int] = self._convert_overlaps_to_set(overlaps)
         groups: list[set[int]] = self._group_overlaps(overlapping_bboxes_set, overlaps)
-        removing: set[int] = self._get_removing_indexes(groups, overlaps)
+        neighbours: dict[int, set[int]] = self._build_neighbours(overlaps)
+        removing: set[int] = self._get_removing_indexes(groups, neighbours)
         skipping: list[str] = []
         for index in removing:
             skipping.append(self.result.layouts[index].id)
         return skipping
 
-    def _find_overlaps(self) -> list[tuple[int, int]]:
+    def _bbox_array(self) -> np.ndarray:
         """
-        Create list of tupples which bounding boxes (bboxes) overlaps. Each tupple is unique.
+        Collect bounding boxes of all layouts into one array. The array is built once and cached.
 
         Returns:
-            Unique list of all tupples that overlaps.
+            Array of shape (N, 4) with columns x_min, y_min, x_max, y_max.
         """
-        overlaps: list[tuple[int, int]] = []
-        number_bboxes = len(self.result.layouts)  # Ensure there are boxes to process
-
-        # print("Overlaps:")
-        for index1 in range(number_bboxes):
-            for index2 in range(index1 + 1, number_bboxes):
-                if self._is_overlapping(index1, index2):
-                    overlaps.append((index1, index2))
-                    # # For debugging
-                    # box1: Layout = self.result.layouts[index1]
-                    # box2: Layout = self.result.layouts[index2]
-                    # box1_debug_string: str = f"({box1.layout_type} {int(box1.confidence * 100)}%"
-                    # box2_debug_string: str = f"({box2.layout_type} {int(box2.confidence * 100)}%"
-                    # print(f"({box1_debug_string}, {box2_debug_string})")
-
-        return overlaps
-
-    def _is_overlapping(self, index1: int, index2: int) -> bool:
+        if self._bboxes is None:
+            bboxes: np.ndarray = np.empty((len(self.result.layouts), 4), dtype=np.float64)
+            for index, region in enumerate(self.result.layouts):
+                bboxes[index] = convert_bbox(region)
+            self._bboxes = bboxes
+        return self._bboxes
+
+    def _layout_confidences(self) -> list[float]:
         """
-        Check if two bounding boxes overlap.
+        Collect confidences of all layouts into one list. The list is built once and cached.
 
-        Args:
-            index1 (int): Index of the first bounding box.
-            index2 (int): Index of the second bounding box.
+        Returns:
+            List of layout confidences indexed by layout index.
+        """
+        if self._confidences is None:
+            self._confidences = [float(region.confidence) for region in self.result.layouts]
+        return self._confidences
+
+    def _find_overlaps(self) -> np.ndarray:
+        """
+        Create array of index pairs which bounding boxes (bboxes) overlaps. Each pair is unique.
+
+        Bboxes are swept along the x axis so only pairs that already overlap horizontally are tested on the y axis.
 
         Returns:
-            True if the bounding boxes overlap, False otherwise.
+            Array of shape (E, 2) with unique pairs of overlapping bbox indexes.
         """
-        return bboxes_overlaps(self.result.layouts[index1], self.result.layouts[index2])
+        bboxes: np.ndarray = self._bbox_array()
+        number_bboxes: int = bboxes.shape[0]
+
+        # Sort by left edge, every bbox can only overlap bboxes starting between its left and right edge
+        order: np.ndarray = np.argsort(bboxes[:, 0], kind="stable")
+        sorted_bboxes: np.ndarray = bboxes[order]
+        ends: np.ndarray = np.searchsorted(sorted_bboxes[:, 0], sorted_bboxes[:, 2], side="right")
+        counts: np.ndarray = np.maximum(ends - np.arange(1, number_bboxes + 1), 0)
+
+        # Expand candidate ranges into pairs of sorted positions
+        firsts: np.ndarray = np.repeat(np.arange(number_bboxes), counts)
+        offsets: np.ndarray = np.arange(firsts.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        seconds: np.ndarray = firsts + offsets + 1
+
+        # Keep pairs that overlap on the y axis as well
+        is_overlap: np.ndarray = (sorted_bboxes[firsts, 3] >= sorted_bboxes[seconds, 1]) & (
+            sorted_bboxes[firsts, 1] <= sorted_bboxes[seconds, 3]
+        )
+        index1: np.ndarray = order[firsts[is_overlap]]
+        index2: np.ndarray = order[seconds[is_overlap]]
+
+        return np.column_stack((np.minimum(index1, index2), np.maximum(index1, index2)))
 
     def _bboxes_overlaping_percentages(self, index1: int, index2: int) -> tuple:
         """
@@ -115,153 +174,90 @@ class TextractPostProcessingBBoxes:
             First value is percent (0-100) how much first bounding box has in overlaping area.
             Second value is percent (0-100) how much second bounding box has in overlaping area.
         """
-        region1: Layout = self.result.layouts[index1]
-        region2: Layout = self.result.layouts[index2]
+        bboxes: np.ndarray = self._bbox_array()
+        x_min_1, y_min_1, x_max_1, y_max_1 = bboxes[index1].tolist()
+        x_min_2, y_min_2, x_max_2, y_max_2 = bboxes[index2].tolist()
 
-        def bbox_size(region: Layout) -> float:
-            """
-            Calculate the size of a region's bounding box (bbox).
+        area_1: float = max(0, x_max_1 - x_min_1) * max(0, y_max_1 - y_min_1)
+        area_2: float = max(0, x_max_2 - x_min_2) * max(0, y_max_2 - y_min_2)
 
-            Args:
-                region (Layout): A region from amazon textract document.
-
-            Returns:
-                Size of the bbox.
-            """
-            x_min, y_min, x_max, y_max = convert_bbox(region)
-            return max(0, x_max - x_min) * max(0, y_max - y_min)
-
-        area_1: float = bbox_size(region1)
-        area_2: float = bbox_size(region2)
-
-        def bboxes_intersection_size(region_1: Layout, region_2: Layout) -> float:
-            """
-            Calculate the intersection size of two region's bounding boxes.
-
-            Args:
-                region_1 (Layout): A region from amazon textract document.
-                region_2 (Layout): A region from amazon textract document.
-
-            Returns:
-                Size of intersection.
-            """
-            x_min_1, y_min_1, x_max_1, y_max_1 = convert_bbox(region_1)
-            x_min_2, y_min_2, x_max_2, y_max_2 = convert_bbox(region_2)
-
-            x_overlap = max(0, min(x_max_1, x_max_2) - max(x_min_1, x_min_2))
-            y_overlap = max(0, min(y_max_1, y_max_2) - max(y_min_1, y_min_2))
-
-            return x_overlap * y_overlap
-
-        intersect_area = bboxes_intersection_size(region1, region2)
+        x_overlap = max(0, min(x_max_1, x_max_2) - max(x_min_1, x_min_2))
+        y_overlap = max(0, min(y_max_1, y_max_2) - max(y_min_1, y_min_2))
+        intersect_area = x_overlap * y_overlap
 
         percent1 = (intersect_area / area_1) * 100 if area_1 > 0 else 0
         percent2 = (intersect_area / area_2) * 100 if area_2 > 0 else 0
 
         return percent1, percent2
 
-    def _convert_overlaps_to_set(self, overlaps: list[tuple[int, int]]) -> set[int]:
+    def _convert_overlaps_to_set(self, overlaps: np.ndarray) -> set[int]:
         """
-        From list of tupples create set of index.
+        From array of pairs create set of index.
 
         Args:
-            overlaps (list[tuple[int, int]]): Unique list of all tupples that overlaps.
+            overlaps (np.ndarray): Array of shape (E, 2) with unique pairs of overlapping bbox indexes.
 
         Return:
             Set of bbox indexes that overlaps with some other bbox.
         """
-        return {i for pair in overlaps for i in pair}
+        return set(np.unique(overlaps).tolist())
 
-    def _get_group_index(self, searching: int, all_groups: list[set[int]]) -> int:
-        """
-        Find index of group that contain searching element.
-
-        Args:
-            searching (int): Index of bbox we are searching for.
-            all_groups (list[set[int]]): Currently built groups that contain set of indexes.
-
-        Returns:
-            Index if found, -1 otherwise.
-        """
-        return next((i for i, group in enumerate(all_groups) if searching in group), -1)
-
-    def _group_overlaps(self, overlapping_bboxes_set: set[int], overlaps: list[tuple[int, int]]) -> list[set[int]]:
+    def _group_overlaps(self, overlapping_bboxes_set: set[int], overlaps: np.ndarray) -> list[set[int]]:
         """
         Create disjointed groups that contain indexes of bboxes that touches themselves directly or through multiple
         bboxes.
 
         Args:
             overlapping_bboxes_set (set[int]): Set of bbox indexes that overlaps with some other bbox.
-            overlaps (list[tuple[int, int]]): Unique list of all tupples that overlaps.
+            overlaps (np.ndarray): Array of shape (E, 2) with unique pairs of overlapping bbox indexes.
 
         Returns:
             List of groups, where each group contain set of bbox indexes that overlaps either directly or through some
             other bbox(es).
         """
-        groups: list[set[int]] = []
+        union_find: UnionFind = UnionFind(len(self.result.layouts))
+        for index1, index2 in overlaps.tolist():
+            union_find.union(index1, index2)
+
+        groups: defaultdict[int, set[int]] = defaultdict(set)
         for box_index in overlapping_bboxes_set:
-            # Find group if exists or create new
-            group_index: int = self._get_group_index(box_index, groups)
-            group: set[int] = groups[group_index] if group_index >= 0 else set()
-
-            # Fill touching members into group that are not already there:
-            for index1, index2 in overlaps:
-                if box_index == index1:
-                    group.add(index2)
-                if box_index == index2:
-                    group.add(index1)
-
-            # Save group
-            if group_index < 0:
-                groups.append(group)
-            else:
-                groups[group_index] = group
-
-        # Merge groups that have any member in intersection
-        remove_group_indexes = []
-        unique_groups = []
-        for group_index1 in range(len(groups)):
-            if group_index1 in remove_group_indexes:
-                continue
-            group1 = groups[group_index1]
-            for group_index2 in range(group_index1 + 1, len(groups)):
-                if group_index2 in remove_group_indexes:
-                    continue
-                group2 = groups[group_index2]
-                if group1.intersection(group2):
-                    group1 = group1.union(group2)
-                    remove_group_indexes.append(group_index2)
-            unique_groups.append(group1)
+            groups[union_find.find(box_index)].add(box_index)
 
         # # For debugging
         # print("Found groups:")
-        # for group in groups:
+        # for group in groups.values():
         #     print("Group:")
         #     for member_index in group:
         #         box: Layout = self.result.layouts[member_index]
         #         print(f"{box.layout_type} {round(box.confidence * 100)}%    {convert_bbox(box)}")
 
         # Return disjoint sets
-        return unique_groups
-
-    def _indexes_that_can_be_merged(self, groups: list[set[int]]) -> tuple[int, int]:
-        groups_size = len(groups)
-        for index1 in range(groups_size):
-            group1 = groups[index1]
-            for index2 in range(index1 + 1, groups_size):
-                group2 = groups[index2]
-                if group1 & group2:
-                    return index1, index2
-        return -1, -1
-
-    def _get_removing_indexes(self, groups: list[set[int]], overlaps: list[tuple[int, int]]) -> set[int]:
+        return list(groups.values())
+
+    def _build_neighbours(self, overlaps: np.ndarray) -> dict[int, set[int]]:
+        """
+        Create lookup of direct neighbours for each bbox index.
+
+        Args:
+            overlaps (np.ndarray): Array of shape (E, 2) with unique pairs of overlapping bbox indexes.
+
+        Returns:
+            Dictionary where key is bbox index and value is set of bbox indexes that overlap with it directly.
+        """
+        neighbours: defaultdict[int, set[int]] = defaultdict(set)
+        for index1, index2 in overlaps.tolist():
+            neighbours[index1].add(index2)
+            neighbours[index2].add(index1)
+        return neighbours
+
+    def _get_removing_indexes(self, groups: list[set[int]], neighbours: dict[int, set[int]]) -> set[int]:
         """
         Process each group and gather removing indexes from each group.
 
         Args:
             groups (list[set[int]]): List of groups, where each group contains set of bbox indexes that overlaps either
                 directly or through some other bbox(es).
-            overlaps (list[tuple[int, int]]): Unique list of all tupples that overlaps.
+            neighbours (dict[int, set[int]]): Direct neighbours of each bbox index.
 
         Returns:
             Set of indexes that should be removed.
@@ -269,8 +265,8 @@ class TextractPostProcessingBBoxes:
         remove_indexes: set[int] = set()
 
         for group in groups:
-            removed = self._process_group(group, overlaps)
-            remove_indexes = remove_indexes.union(removed)
+            removed = self._process_group(group, neighbours)
+            remove_indexes.update(removed)
             # # For debugging
             # print("Removing:")
             # for index in removed:
@@ -285,7 +281,7 @@ class TextractPostProcessingBBoxes:
 
         return remove_indexes
 
-    def _process_group(self, group: set[int], overlaps: list[tuple[int, int]]) -> set[int]:
+    def _process_group(self, group: set[int], neighbours: dict[int, set[int]]) -> set[int]:
         """
         Process members of group:
         - take highest score members
@@ -295,22 +291,25 @@ class TextractPostProcessingBBoxes:
         Args:
             group (set[int]): Group containing set of bbox indexes that overlaps either directly
                 or through some other bbox(es).
-            overlaps (list[tuple[int, int]]): Unique list of all tupples that overlaps.
+            neighbours (dict[int, set[int]]): Direct neighbours of each bbox index.
 
         Returns:
             Set of indexes that should be removed.
         """
+        confidences: list[float] = self._layout_confidences()
+
         removed: set[int] = set()
         while group:
             # Find highest score
-            max_score: int = max(group, key=lambda x: float(self.result.layouts[x].confidence))
+            max_score: int = max(group, key=confidences.__getitem__)
 
+            max_score_neighbours: set[int] = neighbours[max_score]
             to_further_process: set[int] = set()
             for member in group:
                 if member == max_score:
                     # We are using higher score
                     pass
-                elif self._is_direct_neightbour(max_score, member, overlaps):
+                elif member in max_score_neighbours:
                     # Remove direct neighbours
                     removed.add(member)
                 else:
@@ -319,22 +318,3 @@ class TextractPostProcessingBBoxes:
             group = to_further_process
 
         return removed
-
-    def _is_direct_neightbour(self, max_score_index: int, member_index: int, overlaps: list[tuple[int, int]]) -> bool:
-        """
-        Check if two members overlap directly.
-
-        Args:
-            max_score_index (int): Member of group that has highest score.
-            member_index (int): Member we want to check if it is neighbour.
-            overlaps (list[tuple[int, int]]): Unique list of all tupples that overlaps.
-
-        Returns:
-            True if bboxes overlaps.
-        """
-        for index1, index2 in overlaps:
-            if index1 == max_score_index and index2 == member_index:
-                return True
-            if index1 == member_index and index2 == max_score_index:
-                return True
-        return False
@@ -1,32 +1,107 @@
 import json
 import sys
 from datetime import date
-from pathlib import Path
+from functools import lru_cache
 from typing import Any, Optional
 
 import textractor.data.constants as constants
 from pdfixsdk import PdfDevRect, PdfPageView, PdfRect, __version__
+from textractor.entities.bbox import BoundingBox
 from textractor.entities.document import Document
 from textractor.entities.layout import Layout
 from textractor.entities.table import Table
 from textractor.entities.table_cell import TableCell
 
+from constants import CONFIG_FILE, CONFIG_PATH
 from process_bboxes import TextractPostProcessingBBoxes
 
+# Template fields of layout types that do not need any processing, list of types:
+# https://docs.aws.amazon.com/textract/latest/dg/layoutresponse.html
+LAYOUT_ELEMENT_FIELDS: dict[str, dict[str, str]] = {
+    constants.LAYOUT_FIGURE: {
+        "flag": "no_join|no_split",
+        "type": "pde_image",
+    },
+    constants.LAYOUT_FOOTER: {
+        "flag": "footer|artifact|no_join|no_split",
+        "text_flag": "no_new_line",
+        "type": "pde_text",
+    },
+    constants.LAYOUT_HEADER: {
+        "flag": "header|artifact|no_join|no_split",
+        "text_flag": "no_new_line",
+        "type": "pde_text",
+    },
+    constants.LAYOUT_SECTION_HEADER: {
+        "heading": "h1",
+        "flag": "no_join|no_split",
+        "text_flag": "no_new_line",
+        "type": "pde_text",
+    },
+    constants.LAYOUT_TEXT: {
+        "flag": "no_join|no_split",
+        "text_flag": "no_new_line",
+        "type": "pde_text",
+    },
+    constants.LAYOUT_TITLE: {
+        "tag": "Title",
+        "flag": "no_join|no_split",
+        "text_flag": "no_new_line",
+        "type": "pde_text",
+    },
+}
+# Template fields of unknown layout types
+DEFAULT_ELEMENT_FIELDS: dict[str, str] = {
+    "flag": "no_join|no_split",
+    "text_flag": "no_new_line",
+    "type": "pde_text",
+}
+
+
+@lru_cache(maxsize=1)
+def get_current_version() -> str:
+    """
+    Read the current version from config.json. Version does not change while running so it is read only once.
+
+    Returns:
+        The current version of the Docker image.
+    """
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+            return config.get("version", "unknown")
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error reading {CONFIG_FILE}: {e}", file=sys.stderr)
+        return "unknown"
+
+
+@lru_cache(maxsize=32)
+def get_layout_label(layout_type: str) -> str:
+    """
+    Create readable label of layout type used in element comments. There are only few layout types so labels are
+    cached.
+
+    Args:
+        layout_type (str): Amazon Textract layout type, e.g. "LAYOUT_SECTION_HEADER".
+
+    Returns:
+        Label of layout type, e.g. "section header".
+    """
+    return layout_type.replace("LAYOUT_", "").replace("_", " ").lower()
+
 
 class TemplateJsonCreator:
     """
     Class that prepares each page and in the end creates whole template json file for PDFix-SDK
     """
 
-    # Constants
-    CONFIG_FILE = "config.json"
-
     def __init__(self) -> None:
         """
         Initializes pdfix sdk template json creation by preparing list for each page.
         """
         self.template_json_pages: list = []
+        # Device rectangle is only read by RectToPage so one instance is reused for all conversions
+        self.device_rect: PdfDevRect = PdfDevRect()
 
     def create_json_dict_for_document(self, zoom: float) -> dict:
         """
@@ -38,8 +113,8 @@ class TemplateJsonCreator:
         Returns:
             Template json for whole document
         """
-        created_date: str = date.today().strftime("%Y-%m-%d")
-        image_info: str = f"transforms in this docker image of version: {self._get_current_version()}"
+        created_date: str = date.today().isoformat()
+        image_info: str = f"transforms in this docker image of version: {get_current_version()}"
         metadata: dict = {
             "author": "Generated using Amazon Textract AI",
             "created": created_date,
@@ -90,22 +165,6 @@ class TemplateJsonCreator:
         }
         self.template_json_pages.append(json_for_page)
 
-    def _get_current_version(self) -> str:
-        """
-        Read the current version from config.json.
-
-        Returns:
-            The current version of the Docker image.
-        """
-        config_path: Path = Path(__file__).parent.joinpath(f"../{self.CONFIG_FILE}").resolve()
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                return config.get("version", "unknown")
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error reading {self.CONFIG_FILE}: {e}", file=sys.stderr)
-            return "unknown"
-
     def _create_json_for_elements(self, result: Document, page_view: PdfPageView) -> list:
         """
         Prepare initial structural elements for the template based on
@@ -118,118 +177,104 @@ class TemplateJsonCreator:
         Returns:
             List of elements with parameters.
         """
-        elements: list = []
-
         page_w = page_view.GetDeviceWidth()
         page_h = page_view.GetDeviceHeight()
 
         post_processor: TextractPostProcessingBBoxes = TextractPostProcessingBBoxes(result)
-        skipping: list[str] = post_processor.get_list_of_skipping_ids()
+        skipping: set[str] = set(post_processor.get_list_of_skipping_ids())
+
+        created_elements: list[tuple[tuple[float, float], dict[str, Any]]] = [
+            created
+            for created in (
+                self._create_element(region, page_view, page_w, page_h)
+                for region in result.layouts
+                if isinstance(region, Layout) and region.id not in skipping
+            )
+            if created is not None
+        ]
 
-        for region in result.layouts:
-            if not isinstance(region, Layout):
-                continue
+        # Currently we are sorting BBoxes from top to bottom, left to right
+        # for other types of sorting (or keeping original Amazon order) another sorting is needed)
+        created_elements.sort(key=lambda created: created[0])
 
-            layout: Layout = region
+        return [element for _, element in created_elements]
 
-            if layout.id in skipping:
-                continue
+    def _create_element(
+        self, layout: Layout, page_view: PdfPageView, page_w: int, page_h: int
+    ) -> Optional[tuple[tuple[float, float], dict[str, Any]]]:
+        """
+        Prepare structural element for the template based on detected region.
+
+        Args:
+            layout (Layout): AWS Textract Layout class containing all data from AI for region.
+            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            page_w (int): Device width of the page view.
+            page_h (int): Device height of the page view.
 
-            element: dict[str, Any] = {}
-
-            rect = PdfDevRect()
-            offset = 2
-            rect.left = int(layout.bbox.x * page_w - offset)
-            rect.top = int(layout.bbox.y * page_h - offset)
-            rect.right = int((layout.bbox.x + layout.bbox.width) * page_w + offset)
-            rect.bottom = int((layout.bbox.y + layout.bbox.height) * page_h + offset)
-
-            bbox = page_view.RectToPage(rect)
-            element["bbox"] = [str(bbox.left), str(bbox.bottom), str(bbox.right), str(bbox.top)]
-            label = layout.layout_type.replace("LAYOUT_", "").replace("_", " ").lower()
-            element["comment"] = f"{label} {round(layout.confidence * 100)}%"
-
-            # List of types:
-            # https://docs.aws.amazon.com/textract/latest/dg/layoutresponse.html
-            match layout.layout_type:
-                case constants.LAYOUT_FIGURE:
-                    element["flag"] = "no_join|no_split"
-                    element["type"] = "pde_image"
-
-                case constants.LAYOUT_FOOTER:
-                    element["flag"] = "footer|artifact|no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case constants.LAYOUT_HEADER:
-                    element["flag"] = "header|artifact|no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case constants.LAYOUT_LIST:
-                    # No info about type of list (bullets vs numbers)
-                    # element["numbering"] = "Circle"  # "Decimal"
-                    list_items = self._create_list_items(layout, page_view)
-                    element["element_template"] = {
+        Returns:
+            Numeric position of element used for sorting and element with parameters, None if element is skipped.
+        """
+        # Element bboxes are slightly enlarged so they cover whole content
+        offset: int = 2
+
+        bbox = self._convert_bbox_to_page(layout.bbox, page_view, page_w, page_h, offset)
+        label: str = get_layout_label(layout.layout_type)
+
+        # Most layout types only add fixed fields, the rest needs own processing
+        fields: dict[str, Any]
+        match layout.layout_type:
+            case constants.LAYOUT_LIST:
+                # No info about type of list (bullets vs numbers)
+                # "numbering": "Circle"  # "Decimal"
+                list_items = self._create_list_items(layout, page_view)
+                fields = {
+                    "element_template": {
                         "template": {
                             "element_create": [{"elements": list_items, "statement": "$if"}],
                         },
-                    }
-                    element["flag"] = "no_join|no_split"
-                    element["type"] = "pde_list"
-
-                case constants.LAYOUT_PAGE_NUMBER:
-                    number_flag = self._is_footer_or_header(page_view, bbox)
-                    element["flag"] = f"{number_flag}|artifact|no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case constants.LAYOUT_SECTION_HEADER:
-                    element["heading"] = "h1"
-                    element["flag"] = "no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case constants.LAYOUT_TABLE:
-                    table_data: Optional[Table] = self._find_table_in_children(layout)
-                    if table_data:
-                        cell_elements: list = self._create_table_cells(table_data, page_view)
-                        element["element_template"] = {
-                            "template": {
-                                "element_create": [{"elements": cell_elements, "query": {}, "statement": "$if"}],
-                            },
-                        }
-                        element["row_num"] = table_data.row_count
-                        element["col_num"] = table_data.column_count
-                        element["flag"] = "no_join|no_split"
-                        element["type"] = "pde_table"
-                    else:
-                        # Skip this element as it does not contain information about table
-                        continue
-
-                case constants.LAYOUT_TEXT:
-                    element["flag"] = "no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case constants.LAYOUT_TITLE:
-                    element["tag"] = "Title"
-                    element["flag"] = "no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-                case _:
-                    element["flag"] = "no_join|no_split"
-                    element["text_flag"] = "no_new_line"
-                    element["type"] = "pde_text"
-
-            elements.append(element)
-
-        # Currently we are sorting BBoxes from top to bottom, left to right
-        # for other types of sorting (or keeping original Amazon order) another sorting is needed)
-        elements = sorted(elements, key=lambda x: (float(x["bbox"][3]), 1000.0 - float(x["bbox"][0])), reverse=True)
+                    },
+                    "flag": "no_join|no_split",
+                    "type": "pde_list",
+                }
+
+            case constants.LAYOUT_PAGE_NUMBER:
+                number_flag = self._is_footer_or_header(page_h / 2, bbox)
+                fields = {
+                    "flag": f"{number_flag}|artifact|no_join|no_split",
+                    "text_flag": "no_new_line",
+                    "type": "pde_text",
+                }
+
+            case constants.LAYOUT_TABLE:
+                table_data: Optional[Table] = self._find_table_in_children(layout)
+                if table_data is None:
+                    # Skip this element as it does not contain information about table
+                    return None
+
+                cell_elements: list = self._create_table_cells(table_data, page_view)
+                fields = {
+                    "element_template": {
+                        "template": {
+                            "element_create": [{"elements": cell_elements, "query": {}, "statement": "$if"}],
+                        },
+                    },
+                    "row_num": table_data.row_count,
+                    "col_num": table_data.column_count,
+                    "flag": "no_join|no_split",
+                    "type": "pde_table",
+                }
+
+            case layout_type:
+                fields = LAYOUT_ELEMENT_FIELDS.get(layout_type, DEFAULT_ELEMENT_FIELDS)
+
+        element: dict[str, Any] = {
+            "bbox": self._convert_bbox_to_str_list(bbox),
+            "comment": f"{label} {round(layout.confidence * 100)}%",
+            **fields,
+        }
 
-        return elements
+        # Position is kept numeric so bbox strings do not have to be parsed back for sorting
+        return (-bbox.top, bbox.left), element
 
     def _create_list_items(self, list_layout: Layout, page_view: PdfPageView) -> list:
         """
@@ -254,15 +299,10 @@ class TemplateJsonCreator:
 
             layout: Layout = region
 
-            rect = PdfDevRect()
-            rect.left = int(layout.bbox.x * page_w)
-            rect.top = int(layout.bbox.y * page_h)
-            rect.right = int((layout.bbox.x + layout.bbox.width) * page_w)
-            rect.bottom = int((layout.bbox.y + layout.bbox.height) * page_h)
-            bbox = page_view.RectToPage(rect)
+            bbox = self._convert_bbox_to_page(layout.bbox, page_view, page_w, page_h)
 
             item: dict = {
-                "bbox": [str(bbox.left), str(bbox.bottom), str(bbox.right), str(bbox.top)],
+                "bbox": self._convert_bbox_to_str_list(bbox),
                 "comment": f"List Item {round(layout.confidence * 100)}%",
                 "type": "pde_text",
             }
@@ -309,6 +349,8 @@ class TemplateJsonCreator:
             List of cell elements with parameters.
         """
         cells: list = []
+        # Positions of cells returned by AWS, collected while emitting them so children are traversed only once
+        occupied: set[tuple[int, int]] = set()
 
         page_w = page_view.GetDeviceWidth()
         page_h = page_view.GetDeviceHeight()
@@ -322,19 +364,15 @@ class TemplateJsonCreator:
             # AWS returns these as numbers instead of indexes
             cell_row: int = cell.row_index
             cell_column: int = cell.col_index
+            occupied.add((cell_row, cell_column))
 
             cell_position: str = f"[{cell_row}, {cell_column}]"
             cell_span: str = f"[{cell.row_span}, {cell.col_span}]"
 
-            rect = PdfDevRect()
-            rect.left = int(cell.bbox.x * page_w)
-            rect.top = int(cell.bbox.y * page_h)
-            rect.right = int((cell.bbox.x + cell.bbox.width) * page_w)
-            rect.bottom = int((cell.bbox.y + cell.bbox.height) * page_h)
-            bbox = page_view.RectToPage(rect)
+            bbox = self._convert_bbox_to_page(cell.bbox, page_view, page_w, page_h)
 
             create_cell: dict = {
-                "bbox": [str(bbox.left), str(bbox.bottom), str(bbox.right), str(bbox.top)],
+                "bbox": self._convert_bbox_to_str_list(bbox),
                 "cell_column": str(cell_column),
                 "cell_column_span": str(cell.col_span),
                 "cell_row": str(cell_row),
@@ -350,24 +388,28 @@ class TemplateJsonCreator:
             cells.append(create_cell)
 
         # Fill table with empty cells
-        for row_index in range(table_data.row_count):
-            for col_index in range(table_data.column_count):
-                row_number: int = row_index + 1
-                column_number: int = col_index + 1
-                if not any(
-                    cell.row_index == row_number and cell.col_index == column_number for cell in table_data.children
-                ):
-                    empty_cell: dict = {
-                        "bbox": ["0", "0", "0", "0"],
-                        "cell_column": str(column_number),
-                        "cell_column_span": "0",
-                        "cell_row": str(row_number),
-                        "cell_row_span": "0",
-                        "cell_header": "false",
-                        "comment": f"Cell Pos: [{row_number}, {column_number}] Span: [0, 0] Added by processing",
-                        "type": "pde_cell",
-                    }
-                    cells.append(empty_cell)
+        # Counts are computed by Textractor from cells on every access, so read them once
+        row_count: int = table_data.row_count
+        column_count: int = table_data.column_count
+
+        # Counts are the highest cell indexes, so table is complete when every position is occupied
+        if len(occupied) < row_count * column_count:
+            for row_index in range(row_count):
+                for col_index in range(column_count):
+                    row_number: int = row_index + 1
+                    column_number: int = col_index + 1
+                    if (row_number, column_number) not in occupied:
+                        empty_cell: dict = {
+                            "bbox": ["0", "0", "0", "0"],
+                            "cell_column": str(column_number),
+                            "cell_column_span": "0",
+                            "cell_row": str(row_number),
+                            "cell_row_span": "0",
+                            "cell_header": "false",
+                            "comment": f"Cell Pos: [{row_number}, {column_number}] Span: [0, 0] Added by processing",
+                            "type": "pde_cell",
+                        }
+                        cells.append(empty_cell)
 
         # If we want to sort cells in table, here is the place to do it
         # # Sorting cells from top to bottom, left to right
@@ -388,17 +430,54 @@ class TemplateJsonCreator:
         """
         return "true" if value else "false"
 
-    def _is_footer_or_header(self, page_view: PdfPageView, bbox: PdfRect) -> str:
+    def _convert_bbox_to_page(
+        self, textract_bbox: BoundingBox, page_view: PdfPageView, page_w: int, page_h: int, offset: int = 0
+    ) -> PdfRect:
+        """
+        Convert Amazon Textract bounding box relative to page size into PDF coordinates.
+
+        Args:
+            textract_bbox (BoundingBox): Bounding box with coordinates relative to page size.
+            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            page_w (int): Device width of the page view.
+            page_h (int): Device height of the page view.
+            offset (int): Number of device pixels to enlarge the bounding box by on each side.
+
+        Returns:
+            Bounding box in PDF coordinates.
+        """
+        x: float = textract_bbox.x
+        y: float = textract_bbox.y
+
+        rect: PdfDevRect = self.device_rect
+        rect.left = int(x * page_w - offset)
+        rect.top = int(y * page_h - offset)
+        rect.right = int((x + textract_bbox.width) * page_w + offset)
+        rect.bottom = int((y + textract_bbox.height) * page_h + offset)
+
+        return page_view.RectToPage(rect)
+
+    def _convert_bbox_to_str_list(self, bbox: PdfRect) -> list[str]:
+        """
+        Create bbox value for json as pdfix template expects
+
+        Args:
+            bbox (PdfRect): Bounding box in PDF coordinates
+
+        Returns:
+            List of left, bottom, right and top coordinates converted to strings
+        """
+        return [f"{bbox.left}", f"{bbox.bottom}", f"{bbox.right}", f"{bbox.top}"]
+
+    def _is_footer_or_header(self, half_height: float, bbox: PdfRect) -> str:
         """
         According to Y coordinate of bbox return if it is "header" or "footer"
 
         Args:
-            page_view (PdfPageView): Page view to get page heigh
+            half_height (float): Half of the page view device height
             bbox (PdfRect): Bounding box in PDF coordinates (Y=0 is bottom)
 
         Returns:
             "header" or "footer"
         """
-        page_height = page_view.GetDeviceHeight()
-        half_height = page_height / 2
         return "footer" if bbox.top < half_height else "header"
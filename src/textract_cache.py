@@ -0,0 +1,81 @@
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+
+class TextractResponseCache:
+    """
+    Disk cache of Amazon Textract responses. Responses are keyed by SHA-256 of the analyzed image,
+    so running the same PDF document again does not send identical pages to Amazon Textract.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        """
+        Initializes the cache and creates the cache directory.
+
+        Args:
+            cache_dir (str): Directory where responses are stored.
+        """
+        self.cache_dir: Path = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, image: bytes) -> Optional[dict]:
+        """
+        Read cached Amazon Textract response.
+
+        Args:
+            image (bytes): Encoded image that is analyzed.
+
+        Returns:
+            Amazon Textract response or None if it is not cached.
+        """
+        path: Path = self._get_path(image)
+        try:
+            response: Any = orjson.loads(path.read_bytes())
+            return response if isinstance(response, dict) else None
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Error reading cached Amazon Textract response {path}: {e}", file=sys.stderr)
+            return None
+
+    def save(self, image: bytes, response: dict) -> None:
+        """
+        Store Amazon Textract response. File is written under temporary name and then renamed,
+        so concurrent readers never see partially written response.
+
+        Args:
+            image (bytes): Encoded image that was analyzed.
+            response (dict): Amazon Textract response.
+        """
+        path: Path = self._get_path(image)
+        temporary_path: Optional[str] = None
+        try:
+            with tempfile.NamedTemporaryFile("wb", dir=self.cache_dir, delete=False) as file:
+                temporary_path = file.name
+                file.write(orjson.dumps(response))
+            os.replace(temporary_path, path)
+            temporary_path = None
+        except OSError as e:
+            print(f"Error writing cached Amazon Textract response {path}: {e}", file=sys.stderr)
+        finally:
+            # Do not leave orphaned temporary files in cache when writing or renaming failed
+            if temporary_path is not None:
+                Path(temporary_path).unlink(missing_ok=True)
+
+    def _get_path(self, image: bytes) -> Path:
+        """
+        Create path of cached response for the image.
+
+        Args:
+            image (bytes): Encoded image that is analyzed.
+
+        Returns:
+            Path to JSON file with cached response.
+        """
+        return self.cache_dir.joinpath(f"{hashlib.sha256(image).hexdigest()}.json")
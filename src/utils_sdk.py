@@ -1,5 +1,4 @@
 import ctypes
-import json
 from typing import Optional
 
 from pdfixsdk import Pdfix, PsAccountAuthorization
@@ -27,20 +26,18 @@ def authorize_sdk(pdfix: Pdfix, license_name: Optional[str], license_key: Option
         print("No license name or key provided. Using PDFix SDK trial")
 
 
-def json_to_raw_data(json_dict: dict) -> tuple[ctypes.Array[ctypes.c_ubyte], int]:
+def bytes_to_raw_data(data: bytes) -> tuple[ctypes.Array[ctypes.c_ubyte], int]:
     """
-    Converts a JSON dictionary into a raw byte array (c_ubyte array) that can be used for low-level data operations.
+    Converts bytes into a raw byte array (c_ubyte array) that can be used for low-level data operations.
 
     Parameters:
-        json_dict (dict): A Python dictionary to be converted into JSON format and then into raw bytes.
+        data (bytes): Already serialized data, e.g. UTF-8 encoded JSON.
 
     Returns:
         tuple: A tuple containing:
-            - json_data_raw (ctypes.c_ubyte array): The raw byte array representation of the JSON data.
-            - json_data_size (int): The size of the JSON data in bytes.
+            - data_raw (ctypes.c_ubyte array): The raw byte array representation of the data.
+            - data_size (int): The size of the data in bytes.
     """
-    json_str: str = json.dumps(json_dict)
-    json_data: bytearray = bytearray(json_str.encode("utf-8"))
-    json_data_size: int = len(json_str)
-    json_data_raw: ctypes.Array[ctypes.c_ubyte] = (ctypes.c_ubyte * json_data_size).from_buffer(json_data)
-    return json_data_raw, json_data_size
+    data_size: int = len(data)
+    data_raw: ctypes.Array[ctypes.c_ubyte] = (ctypes.c_ubyte * data_size).from_buffer_copy(data)
+    return data_raw, data_size
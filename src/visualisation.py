@@ -1,14 +1,43 @@
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Sequence
 
 import cv2
-from pdfixsdk import PdfDevRect, PdfPageView
+import numpy as np
+from pdfixsdk import PdfPageView
 from textractor.data.constants import (
     LAYOUT_LIST,
     LAYOUT_TABLE,
 )
+from textractor.entities.bbox import BoundingBox
 from textractor.entities.document import Document
 from textractor.entities.layout import Layout
 
+from constants import JPEG_QUALITY
+
+# Left, top, right and bottom pixel coordinates in rendered page
+DeviceRect = tuple[int, int, int, int]
+# Rectangle, label, confidence, text color and outline color of region drawn into rendered page
+Region = tuple[DeviceRect, str, float, tuple, tuple]
+
+
+@lru_cache(maxsize=256)
+def get_text_size(text: str, font: int, scale: float, thickness: int) -> tuple[Sequence[int], int]:
+    """
+    Measures text printed into the image. Labels repeat a lot (e.g. "Cell 97%"), so sizes are cached.
+
+    Args:
+        text (str): Text to measure.
+        font (int): OpenCV font face.
+        scale (float): Font scale.
+        thickness (int): Thickness of text strokes.
+
+    Returns:
+        Width and height of the text and baseline offset.
+    """
+    return cv2.getTextSize(text, font, scale, thickness)
+
 
 class VisualizeAmazonResults:
     """
@@ -17,7 +46,9 @@ class VisualizeAmazonResults:
     This class focuses on layouts and sublayouts like tables and lists.
     """
 
-    def __init__(self, result: Document, image: cv2.typing.MatLike, id: str, page_number: int) -> None:
+    def __init__(
+        self, result: Document, image: cv2.typing.MatLike, id: str, page_number: int, output_dir: Path
+    ) -> None:
         """
         Initializes the VisualizeAmazonResults instance.
 
@@ -26,11 +57,13 @@ class VisualizeAmazonResults:
             image (cv2.typing.MatLike): The image where the results will be visualized.
             id (string): PDF document name.
             page_number (int): PDF file page number.
+            output_dir (Path): Folder where image is saved.
         """
         self.document = result
         self.image = image
         self.id = id
         self.page_number = page_number
+        self.output_dir = output_dir
 
     def visualize(self, page_view: PdfPageView) -> None:
         """
@@ -42,94 +75,111 @@ class VisualizeAmazonResults:
         page_w = page_view.GetDeviceWidth()
         page_h = page_view.GetDeviceHeight()
 
-        # Draw into image layouts, tables and lists
+        # Layouts whose children are visualized too, their label is shifted up to not cover the first child label
+        child_collectors: dict[str, Callable[[list[Region], int, int, Layout], None]] = {
+            LAYOUT_TABLE: self._collect_table_cells,
+            LAYOUT_LIST: self._collect_list_items,
+        }
+        green_color = (0, 255, 0)
+        black_color = (0, 0, 0)
+        offset = 2
+
+        # Collect regions of layouts, tables and lists in one traversal
+        regions: list[Region] = []
         for layout in self.document.layouts:
-            rect = PdfDevRect()
-            offset = 2
-            rect.left = int(layout.bbox.x * page_w - offset)
-            rect.top = int(layout.bbox.y * page_h - offset)
-            rect.right = int((layout.bbox.x + layout.bbox.width) * page_w + offset)
-            rect.bottom = int((layout.bbox.y + layout.bbox.height) * page_h + offset)
-
-            layout_type = layout.layout_type
-            if layout_type == LAYOUT_TABLE:
-                self._visualize_table_cells(page_view, layout)
-                rect.top -= 6
-                rect.bottom -= 6
-            if layout_type == LAYOUT_LIST:
-                self._visualize_list_items(page_view, layout)
-                rect.top -= 6
-                rect.bottom -= 6
-
-            green_color = (0, 255, 0)
-            black_color = (0, 0, 0)
-            thickness = 2
-            cv2.rectangle(self.image, (rect.left, rect.top), (rect.right, rect.bottom), green_color, thickness)
-            self._print_text(rect, layout.layout_type, layout.confidence, black_color, green_color)
+            left, top, right, bottom = self._to_device_rect(layout.bbox, page_w, page_h, offset)
+
+            collect_children = child_collectors.get(layout.layout_type)
+            if collect_children is not None:
+                collect_children(regions, page_w, page_h, layout)
+                top -= 6
+                bottom -= 6
+            rect = (left, top, right, bottom)
+
+            regions.append((rect, layout.layout_type, layout.confidence, black_color, green_color))
+
+        # Draw outlines of all regions with the same color in one call
+        outlines: defaultdict[tuple, list[np.ndarray]] = defaultdict(list)
+        for (left, top, right, bottom), _, _, _, bg_color in regions:
+            corners = ((left, top), (right, top), (right, bottom), (left, bottom))
+            outlines[bg_color].append(np.array(corners, dtype=np.int32))
+
+        thickness = 2
+        for bg_color, contours in outlines.items():
+            cv2.polylines(self.image, contours, True, bg_color, thickness)
+
+        # Print labels over all outlines, cells and items are labeled before their layout
+        for rect, type_text, confidence, text_color, bg_color in regions:
+            self._print_text(rect, type_text, confidence, text_color, bg_color)
 
         # Save the image to filesystem
-        path: Path = Path(__file__).parent.joinpath(f"../output/{self.id}-{self.page_number}.jpg").resolve()
-        cv2.imwrite(str(path), self.image)
+        path: Path = self.output_dir.joinpath(f"{self.id}-{self.page_number}.jpg")
+        cv2.imwrite(str(path), self.image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
 
-    def _visualize_table_cells(self, page_view: PdfPageView, table_layout: Layout) -> None:
+    def _to_device_rect(self, bbox: BoundingBox, page_w: int, page_h: int, offset: int = 0) -> DeviceRect:
         """
-        Visualizes cells from table in the image.
+        Converts normalized Textract bounding box into device rectangle of rendered page.
 
         Args:
-            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            bbox (BoundingBox): Bounding box with coordinates in range 0-1.
+            page_w (int): Width of rendered page.
+            page_h (int): Height of rendered page.
+            offset (int): How many pixels is rectangle enlarged on each side.
+
+        Returns:
+            The device rectangle as left, top, right and bottom pixel coordinates.
+        """
+        return (
+            int(bbox.x * page_w - offset),
+            int(bbox.y * page_h - offset),
+            int((bbox.x + bbox.width) * page_w + offset),
+            int((bbox.y + bbox.height) * page_h + offset),
+        )
+
+    def _collect_table_cells(self, regions: list[Region], page_w: int, page_h: int, table_layout: Layout) -> None:
+        """
+        Collects cells from table for visualization.
+
+        Args:
+            regions (list[Region]): Regions to draw into the image.
+            page_w (int): Width of rendered page.
+            page_h (int): Height of rendered page.
             table_layout (Layout): The data containing the textract table region.
         """
         # Get information about table
         table_data = table_layout.children[0]
 
-        page_w = page_view.GetDeviceWidth()
-        page_h = page_view.GetDeviceHeight()
-
         # Loop through each cell's bounding box in the region
         for cell in table_data.children:
-            rect = PdfDevRect()
-            rect.left = int(cell.bbox.x * page_w)
-            rect.top = int(cell.bbox.y * page_h)
-            rect.right = int((cell.bbox.x + cell.bbox.width) * page_w)
-            rect.bottom = int((cell.bbox.y + cell.bbox.height) * page_h)
-
-            # Draw the cell rectangle on the image for visualization (optional step)
             blue_color = (255, 0, 0)
             white_color = (255, 255, 255)
-            cv2.rectangle(self.image, (rect.left, rect.top), (rect.right, rect.bottom), blue_color, 2)
-            self._print_text(rect, "Cell", cell.confidence, white_color, blue_color)
+            rect = self._to_device_rect(cell.bbox, page_w, page_h)
+            regions.append((rect, "Cell", cell.confidence, white_color, blue_color))
 
-    def _visualize_list_items(self, page_view: PdfPageView, list_layout: Layout) -> None:
+    def _collect_list_items(self, regions: list[Region], page_w: int, page_h: int, list_layout: Layout) -> None:
         """
-        Visualizes items from list in the image.
+        Collects items from list for visualization.
 
         Args:
-            page_view (PdfPageView): The view of the PDF page used for coordinate conversion.
+            regions (list[Region]): Regions to draw into the image.
+            page_w (int): Width of rendered page.
+            page_h (int): Height of rendered page.
             list_layout (Layout): The data containing the textract list region.
         """
-        page_w = page_view.GetDeviceWidth()
-        page_h = page_view.GetDeviceHeight()
-
         for item in list_layout.children:
-            rect = PdfDevRect()
-            rect.left = int(item.bbox.x * page_w)
-            rect.top = int(item.bbox.y * page_h)
-            rect.right = int((item.bbox.x + item.bbox.width) * page_w)
-            rect.bottom = int((item.bbox.y + item.bbox.height) * page_h)
-
             red_color = (0, 0, 255)
             black_color = (0, 0, 0)
-            cv2.rectangle(self.image, (rect.left, rect.top), (rect.right, rect.bottom), red_color, 2)
-            self._print_text(rect, "Item", item.confidence, black_color, red_color)
+            rect = self._to_device_rect(item.bbox, page_w, page_h)
+            regions.append((rect, "Item", item.confidence, black_color, red_color))
 
     def _print_text(
-        self, rect: PdfDevRect, type_text: str, confidence: float, text_color: tuple, bg_color: tuple
+        self, rect: DeviceRect, type_text: str, confidence: float, text_color: tuple, bg_color: tuple
     ) -> None:
         """ "
         Prints text on the image with a background rectangle.
 
         Args:
-            rect (PdfDevRect): The rectangle where the text will be printed.
+            rect (DeviceRect): The device rectangle where the text will be printed.
             type_text (str): Text to print (e.g., "Cell", "Item", "LAYOUT_TABLE").
             confidence (float): The confidence score of the text recognition.
             text_color (tuple): The color of the text in BGR format.
@@ -139,13 +189,13 @@ class VisualizeAmazonResults:
         scale = 0.5
         thickness = 1
 
-        original_position = (rect.left + 2, rect.top + 10)
+        original_position = (rect[0] + 2, rect[1] + 10)
 
         short_type = type_text.split("_")[-1]
         percentage = int(confidence * 100)
         text = f"{short_type} {percentage}%"
 
-        (text_w, text_h), baseline = cv2.getTextSize(text, font, scale, thickness)
+        (text_w, text_h), baseline = get_text_size(text, font, scale, thickness)
         border = 2
         top_left = (original_position[0] - border, original_position[1] - text_h - border)
         bottom_right = (original_position[0] + text_w + border, original_position[1] + baseline + border)
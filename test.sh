@@ -42,11 +42,15 @@ if [ -d "$(pwd)/$TEMPORARY_DIRECTORY" ]; then
 fi
 mkdir -p $(pwd)/$TEMPORARY_DIRECTORY
 
+info "Starting docker container shared by all tests..."
+CONTAINER=$(docker run -d $PLATFORM -v $(pwd):/data -w /data --entrypoint sleep $DOCKER_IMAGE infinity)
+AUTOTAG="docker exec $CONTAINER /usr/autotag/venv/bin/python3 /usr/autotag/src/main.py"
+
 info "List files in /usr/autotag"
-docker run --rm $PLATFORM -v $(pwd):/data -w /data --entrypoint ls $DOCKER_IMAGE /usr/autotag/
+docker exec $CONTAINER ls /usr/autotag/
 
 info "Test #01: Show help"
-docker run --rm $PLATFORM -v $(pwd):/data -w /data $DOCKER_IMAGE --help > /dev/null
+$AUTOTAG --help > /dev/null
 if [ $? -eq 0 ]; then
     success "passed"
 else
@@ -55,7 +59,7 @@ else
 fi
 
 info "Test #02: Extract config"
-docker run --rm $PLATFORM -v $(pwd):/data -w /data $DOCKER_IMAGE config -o $TEMPORARY_DIRECTORY/config.json > /dev/null
+$AUTOTAG config -o $TEMPORARY_DIRECTORY/config.json > /dev/null
 if [ -f "$(pwd)/$TEMPORARY_DIRECTORY/config.json" ]; then
     success "passed"
 else
@@ -64,7 +68,7 @@ else
 fi
 
 info "Test #03: Run autotag"
-docker run --rm $PLATFORM -v $(pwd):/data -w /data $DOCKER_IMAGE tag --aws_id "$AWS_ID" --aws_secret "$AWS_SECRET" --aws_region "$AWS_REGION" -i examples/air_quality.pdf -o $TEMPORARY_DIRECTORY/air_quality-tagged.pdf > /dev/null
+$AUTOTAG tag --aws_id "$AWS_ID" --aws_secret "$AWS_SECRET" --aws_region "$AWS_REGION" -i examples/air_quality.pdf -o $TEMPORARY_DIRECTORY/air_quality-tagged.pdf > /dev/null
 if [ -f "$(pwd)/$TEMPORARY_DIRECTORY/air_quality-tagged.pdf" ]; then
     success "passed"
 else
@@ -73,7 +77,7 @@ else
 fi
 
 info "Test #04: Run create template"
-docker run --rm $PLATFORM -v $(pwd):/data -w /data $DOCKER_IMAGE template --aws_id "$AWS_ID" --aws_secret "$AWS_SECRET" --aws_region "$AWS_REGION" -i examples/air_quality.pdf -o $TEMPORARY_DIRECTORY/air_quality.json > /dev/null
+$AUTOTAG template --aws_id "$AWS_ID" --aws_secret "$AWS_SECRET" --aws_region "$AWS_REGION" -i examples/air_quality.pdf -o $TEMPORARY_DIRECTORY/air_quality.json > /dev/null
 if [ -f "$(pwd)/$TEMPORARY_DIRECTORY/air_quality.json" ]; then
     success "passed"
 else
@@ -87,6 +91,9 @@ rm -f $TEMPORARY_DIRECTORY/air_quality-tagged.pdf
 rm -f $TEMPORARY_DIRECTORY/air_quality.json
 rmdir $(pwd)/$TEMPORARY_DIRECTORY
 
+info "Removing docker container"
+docker rm -f $CONTAINER > /dev/null
+
 info "Removing testing docker image"
 docker rmi $DOCKER_IMAGE
 
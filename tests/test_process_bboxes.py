@@ -0,0 +1,62 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent.joinpath("src")))
+
+from process_bboxes import TextractPostProcessingBBoxes  # noqa: E402
+
+
+def create_chain_document(chain: list[int], confidences: list[float]) -> Any:
+    """
+    Create document with layouts lying in one row, each layout overlaps only its predecessor and successor in chain.
+
+    Args:
+        chain (list[int]): Layout indexes in order from left to right.
+        confidences (list[float]): Confidence of each layout indexed by layout index.
+
+    Returns:
+        Object providing layouts the same way as Amazon Textract Document.
+    """
+    positions: dict[int, int] = {index: position for position, index in enumerate(chain)}
+    layouts: list[SimpleNamespace] = [
+        SimpleNamespace(
+            id=f"layout{index}",
+            confidence=confidence,
+            bbox=SimpleNamespace(x=0.1 * positions[index], y=0.1, width=0.15, height=0.1),
+        )
+        for index, confidence in enumerate(confidences)
+    ]
+    return SimpleNamespace(layouts=layouts)
+
+
+class TestTextractPostProcessingBBoxes(unittest.TestCase):
+    # Overlaps form path 0-4-3-2-5-1. Previous grouping put 2 and 5 into two groups {0, 2, 3, 4, 5} and {1, 2, 5}
+    # and processed them separately, so it skipped layout 5 and kept layout 1.
+    CHAIN: list[int] = [0, 4, 3, 2, 5, 1]
+    CONFIDENCES: list[float] = [0.5, 0.6, 0.8, 0.95, 0.9, 0.7]
+
+    def test_overlapping_layouts_form_one_group(self) -> None:
+        document: Any = create_chain_document(self.CHAIN, self.CONFIDENCES)
+        post_processing: TextractPostProcessingBBoxes = TextractPostProcessingBBoxes(document)
+
+        overlaps = post_processing._find_overlaps()
+        groups: list[set[int]] = post_processing._group_overlaps(
+            post_processing._convert_overlaps_to_set(overlaps), overlaps
+        )
+
+        self.assertEqual(groups, [{0, 1, 2, 3, 4, 5}])
+
+    def test_skipping_ids_of_connected_layouts(self) -> None:
+        document: Any = create_chain_document(self.CHAIN, self.CONFIDENCES)
+
+        skipping: list[str] = TextractPostProcessingBBoxes(document).get_list_of_skipping_ids()
+
+        # 3 wins and removes 4 and 2, then 5 wins and removes 1, 0 is kept
+        self.assertEqual(sorted(skipping), ["layout1", "layout2", "layout4"])
+
+
+if __name__ == "__main__":
+    unittest.main()